@@ -0,0 +1,213 @@
+"""Benchmark do pipeline do painel: gera planilhas sintéticas e mede cada etapa da atualização.
+
+Uso:
+    python benchmark_painel.py                              # 1k, 10k e 100k linhas
+    python benchmark_painel.py --linhas 1000 1000000 --saida hoje.json
+    python benchmark_painel.py --comparar ontem.json --saida hoje.json
+
+Cada tamanho roda num processo separado (o pico de RSS de um não contamina o outro) e a
+renderização usa a plataforma "offscreen" do Qt, então roda sem monitor.
+"""
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import sys
+import json
+import time
+import re
+import random
+import argparse
+import platform
+import statistics
+import shutil
+import subprocess
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta
+
+import prioridades as p
+
+PASTA_PLANILHAS = os.path.join(tempfile.gettempdir(), "benchmark_painel")
+TAMANHOS_PADRAO = (1_000, 10_000, 100_000)
+SERVICOS = ["montagem, win11pro, 1 sdd 256, intel i5", "montagem, win10pro, 1 sdd 480, intel i3", "Detalhe não disponível",
+            "formatação + imagem padrão", "troca de fonte e memória"]
+STATUS_ABERTOS = [p.STATUS_PENDENTE, p.STATUS_AGUARDANDO, p.STATUS_AGUARDANDO_CHEGADA, p.STATUS_EM_MONTAGEM]
+
+# --- PLANILHA SINTÉTICA ---
+def gerar_planilha(n_linhas, semente=42):
+    """Planilha no formato da Status_dos_pedidos: até 2% de pedidos em aberto no topo e o restante
+    finalizado (90% concluídos, 10% cancelados) espalhado pelos últimos 3 anos, mais denso nos dias recentes."""
+    import openpyxl
+    os.makedirs(PASTA_PLANILHAS, exist_ok=True)
+    hoje = datetime.now().replace(minute=0, second=0, microsecond=0)
+    caminho = os.path.join(PASTA_PLANILHAS, f"status_{n_linhas}_{semente}_{hoje:%Y%m%d}.xlsx")
+    if os.path.exists(caminho): return caminho
+    rng = random.Random(semente)
+    wb = openpyxl.Workbook(write_only=True); ws = wb.create_sheet("Status_dos_pedidos")
+    ws.append(["Prioridade", p.COLUNA_PEDIDO_ID, p.COLUNA_PV, p.COLUNA_SERVICO, p.COLUNA_STATUS, p.COLUNA_DATA_STATUS, p.COLUNA_QTD])
+    n_abertos = max(1, min(2_000, n_linhas // 50))
+    for i in range(n_linhas):
+        pv = "TERAVIX" if rng.random() < 0.4 else str(rng.randint(100_000, 130_000))
+        qtd = rng.randint(1, 20) if rng.random() < 0.95 else rng.randint(50, 400)
+        if i < n_abertos:
+            status = rng.choice(STATUS_ABERTOS); data = hoje - timedelta(hours=rng.randint(0, 72)) if status != p.STATUS_PENDENTE else None
+        else:
+            status = p.STATUS_CONCLUIDO if rng.random() < 0.9 else p.STATUS_CANCELADO
+            data = hoje - timedelta(days=1095 * rng.random() ** 2, hours=rng.randint(0, 10))
+        ws.append([i + 1, f"CV-{i:010d}", pv, rng.choice(SERVICOS), status, data, qtd])
+    temporario = caminho + ".tmp.xlsx"; wb.save(temporario); os.replace(temporario, caminho)
+    return caminho
+
+# --- MEDIÇÃO ---
+def rss_pico_mb():
+    try:
+        import resource
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pico / (2**20 if sys.platform == "darwin" else 2**10)
+    except ImportError:
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / 2**20
+        except (ImportError, AttributeError):
+            return None
+
+def medir(funcao, repeticoes, memoria=True, preparar=None):
+    """Menor tempo e mediana de `repeticoes` execuções; uma execução extra sob tracemalloc para o pico de memória
+    (separada, porque o tracemalloc distorce o tempo)."""
+    tempos = []; resultado = None
+    for _ in range(repeticoes):
+        if preparar: preparar()
+        inicio = time.perf_counter(); resultado = funcao(); tempos.append(time.perf_counter() - inicio)
+    medicao = {"tempo_s": min(tempos), "mediana_s": statistics.median(tempos)}
+    if memoria:
+        if preparar: preparar()
+        tracemalloc.start(); funcao(); medicao["pico_mem_mb"] = tracemalloc.get_traced_memory()[1] / 2**20; tracemalloc.stop()
+    return resultado, medicao
+
+def contar_widgets(janela):
+    from PySide6.QtWidgets import QWidget
+    return len(janela.findChildren(QWidget))
+
+def executar_tamanho(n_linhas, repeticoes, memoria, leitor):
+    from PySide6.QtWidgets import QApplication
+    pasta = tempfile.mkdtemp(prefix="benchmark_painel_")
+    p.PASTA_CACHE_LEITURA = os.path.join(pasta, "cache"); p.LEITOR_PLANILHA = leitor
+    inicio = time.perf_counter(); caminho = gerar_planilha(n_linhas); geracao_s = time.perf_counter() - inicio
+    fontes = (p.FontePlanilha(caminho),); etapas = {}
+
+    df, etapas["leitura"] = medir(lambda: p.carregar_dados(fontes), repeticoes, memoria)
+    if p.modulo_disponivel("pyarrow"):
+        hashes = p.hashes_fontes(fontes); p.carregar_dados(fontes, hashes)
+        _, etapas["leitura_cache_feather"] = medir(lambda: p.carregar_dados(fontes, hashes), repeticoes, memoria)
+    _, etapas["hash_planilha"] = medir(lambda: p.hashes_fontes(fontes), repeticoes, memoria)
+
+    def historico_novo(): p.HISTORICO = p.HistoricoPedidos(os.path.join(pasta, f"historico_{time.perf_counter_ns()}.sqlite3"))
+    _, etapas["historico_inicial"] = medir(lambda: p.HISTORICO.registrar(df), repeticoes, memoria, preparar=historico_novo)
+    _, etapas["historico_sem_mudanca"] = medir(lambda: p.HISTORICO.registrar(df), repeticoes, memoria)
+
+    agora = datetime.now()
+    dados, etapas["agregacao"] = medir(lambda: p.dados_do_painel(df, p.SEM_FILTRO, agora), repeticoes, memoria)
+    filtro_teravix = p.FiltroPainel(pv=("TERAVIX",))
+    _, etapas["agregacao_filtro_teravix"] = medir(lambda: p.dados_do_painel(df, filtro_teravix, agora), repeticoes, memoria)
+    _, etapas["agregacao_sem_historico"] = medir(lambda: p.dados_do_painel(df, p.SEM_FILTRO, agora, usar_historico=False), repeticoes, memoria)
+    resumo = dados[-1]
+    (metricas, dados_grafico), etapas["metricas_grafico"] = medir(lambda: (p.calcular_metricas_dashboard(resumo), p.calcular_dados_grafico(resumo)), repeticoes, memoria)
+    snapshot, etapas["snapshot"] = medir(lambda: p.gerar_snapshot(p.SEM_FILTRO, fontes), 1, memoria)
+    _, etapas["tick_sem_mudanca"] = medir(lambda: p.carregar_dados_com_cache(fontes), repeticoes, memoria)
+
+    app = QApplication.instance() or QApplication([])
+    janela = p.PainelMtec(); widgets_vazio = contar_widgets(janela)
+    desenhar = lambda: (janela.desenhar_colunas(snapshot.principal, snapshot.concluidos_hoje, snapshot.cancelados_hoje, snapshot.totais_concluidos, snapshot.totais_cancelados),
+                        janela.desenhar_dashboard(snapshot.metricas, snapshot.dados_grafico, p.obter_frase_do_dia()), app.processEvents())
+    _, etapas["render_inicial"] = medir(desenhar, 1, memoria=False)
+    widgets_render = contar_widgets(janela)
+    _, etapas["render_repetido"] = medir(desenhar, repeticoes, memoria)
+    widgets_final = contar_widgets(janela); janela.close()
+    if p.HISTORICO.conexao is not None: p.HISTORICO.conexao.close()
+    shutil.rmtree(pasta, ignore_errors=True)
+
+    return {"linhas": n_linhas, "linhas_validas": int(len(df)), "geracao_planilha_s": geracao_s,
+            "tamanho_planilha_mb": os.path.getsize(caminho) / 2**20, "etapas": etapas, "rss_pico_mb": rss_pico_mb(),
+            "widgets": {"sem_dados": widgets_vazio, "apos_render": widgets_render, "apos_repeticoes": widgets_final}}
+
+def medir_primeiro_quadro(repeticoes):
+    """Tempo até o primeiro quadro de `prioridades.py --medir-inicio` (processo novo a cada vez, como na partida do PC).
+    Roda uma cópia do script numa pasta temporária: sem o paineis.json/ultimo_snapshot.json de quem roda o benchmark
+    e sem escrever no log e no .prom do painel de produção."""
+    pasta = tempfile.mkdtemp(prefix="benchmark_painel_inicio_")
+    try:
+        script = shutil.copy(os.path.abspath(p.__file__), pasta); tempos = []
+        for _ in range(repeticoes):
+            saida = subprocess.run([sys.executable, script, "--medir-inicio"], capture_output=True, text=True, check=True, cwd=pasta).stdout
+            tempos.append(int(re.search(r"primeiro quadro em (\d+) ms", saida).group(1)) / 1000)
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+    return {"tempo_s": min(tempos), "mediana_s": statistics.median(tempos)}
+
+# --- RELATÓRIO ---
+def ambiente(leitor):
+    import pandas, numpy, PySide6
+    return {"data": datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(), "sistema": platform.platform(),
+            "pandas": pandas.__version__, "numpy": numpy.__version__, "pyside6": PySide6.__version__, "leitor": leitor,
+            "calamine": p.modulo_disponivel("python_calamine"), "pyarrow": p.modulo_disponivel("pyarrow")}
+
+def imprimir(resultados, anterior=None, tolerancia=0.2):
+    base = {r["linhas"]: r for r in (anterior or {}).get("resultados", [])}
+    regressoes = []
+    for r in resultados:
+        print(f"\n== {r['linhas']:,} linhas ({r['tamanho_planilha_mb']:.1f} MB, RSS pico {r['rss_pico_mb'] or 0:.0f} MB, "
+              f"widgets {r['widgets']['apos_render']} -> {r['widgets']['apos_repeticoes']}) ==")
+        for etapa, m in r["etapas"].items():
+            linha = f"  {etapa:<26} {m['tempo_s'] * 1000:10.1f} ms  (mediana {m['mediana_s'] * 1000:9.1f} ms)"
+            if "pico_mem_mb" in m: linha += f"  mem {m['pico_mem_mb']:8.1f} MB"
+            antes = base.get(r["linhas"], {}).get("etapas", {}).get(etapa)
+            if antes and antes["tempo_s"] > 0:
+                razao = m["tempo_s"] / antes["tempo_s"]; linha += f"  x{razao:5.2f}"
+                if razao > 1 + tolerancia and m["tempo_s"] - antes["tempo_s"] > 0.005:
+                    linha += "  <-- REGRESSÃO"; regressoes.append((r["linhas"], etapa, razao))
+            print(linha)
+    return regressoes
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline de dados e da renderização do painel.")
+    parser.add_argument("--linhas", type=int, nargs="+", default=list(TAMANHOS_PADRAO), help="tamanhos das planilhas sintéticas")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--leitor", default="auto", choices=["auto"] + list(p.LEITORES_PLANILHA))
+    parser.add_argument("--sem-memoria", action="store_true", help="não mede o pico de memória por etapa (tracemalloc)")
+    parser.add_argument("--saida", help="grava os resultados em JSON")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior para comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="piora relativa que conta como regressão (0.2 = 20%%)")
+    parser.add_argument("--no-processo", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.no_processo:
+        resultados = [executar_tamanho(n, args.repeticoes, not args.sem_memoria, args.leitor) for n in args.linhas]
+    else:
+        resultados = []
+        for n in args.linhas:
+            with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f: saida_filho = f.name
+            comando = [sys.executable, os.path.abspath(__file__), "--no-processo", "--linhas", str(n), "--repeticoes", str(args.repeticoes),
+                       "--leitor", args.leitor, "--saida", saida_filho] + (["--sem-memoria"] if args.sem_memoria else [])
+            subprocess.run(comando, check=True, stdout=subprocess.DEVNULL)
+            with open(saida_filho, encoding="utf-8") as f: resultados += json.load(f)["resultados"]
+            os.remove(saida_filho)
+
+    relatorio = {"ambiente": ambiente(args.leitor), "resultados": resultados}
+    if not args.no_processo: relatorio["primeiro_quadro"] = medir_primeiro_quadro(args.repeticoes)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f: json.dump(relatorio, f, indent=2, ensure_ascii=False)
+    if args.no_processo: return 0
+    anterior = None
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f: anterior = json.load(f)
+    regressoes = imprimir(resultados, anterior, args.tolerancia)
+    quadro = relatorio["primeiro_quadro"]; antes = (anterior or {}).get("primeiro_quadro")
+    print(f"\nprimeiro quadro: {quadro['tempo_s'] * 1000:.0f} ms (mediana {quadro['mediana_s'] * 1000:.0f} ms)"
+          + (f"  x{quadro['tempo_s'] / antes['tempo_s']:.2f}" if antes else ""))
+    if regressoes:
+        print(f"\n{len(regressoes)} etapa(s) mais lenta(s) que a execução anterior além de {args.tolerancia:.0%}.")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,51 @@
+import time
+INICIO_PROCESSO = time.perf_counter()  # referência do "tempo até o primeiro quadro"
 import sys
 import os
 import locale
 import random
-import pandas as pd
+import hashlib
+import sqlite3
+import importlib.util
+import json
+import difflib
+import threading
+import logging
+import logging.handlers
+import asyncio
+import gzip
+import urllib.parse
+from http import HTTPStatus
+from contextlib import contextmanager, nullcontext
+from types import MappingProxyType
+from typing import NamedTuple
 from datetime import datetime, timedelta
-import numpy as np
 from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
-                               QHBoxLayout, QLabel, QFrame, QProgressBar)
-from PySide6.QtGui import QFont
-from PySide6.QtCore import QTimer, Qt
+                               QHBoxLayout, QLabel, QFrame, QProgressBar, QListView, QStyledItemDelegate, QAbstractItemView)
+from PySide6.QtGui import QFont, QFontMetrics, QColor
+from PySide6.QtCore import (QTimer, Qt, QObject, QRunnable, QThreadPool, Signal, QFileSystemWatcher,
+                            QAbstractListModel, QModelIndex, QSize, QRect)
+
+class ModuloSobDemanda:
+    """Importa o módulo no primeiro acesso a um atributo. pandas e NumPy levam mais de meio segundo para importar e
+    só a carga (em segundo plano) precisa deles; a janela abre antes. O import já é seguro entre threads."""
+    def __init__(self, importar): self.importar = importar; self.modulo = None
+
+    def __getattr__(self, atributo):
+        if self.modulo is None: self.modulo = self.importar()
+        return getattr(self.modulo, atributo)
+
+# Imports de verdade (não por nome em texto) para o PyInstaller enxergar pandas e NumPy ao gerar o executável.
+def importar_pandas():
+    import pandas
+    return pandas
+
+def importar_numpy():
+    import numpy
+    return numpy
+
+pd = ModuloSobDemanda(importar_pandas)
+np = ModuloSobDemanda(importar_numpy)
 
 # --- CONFIGURAÇÃO GERAL E DE DADOS ---
 META_SEMANAL = 500 # A meta agora é baseada na QUANTIDADE DE MÁQUINAS
@@ -35,14 +72,244 @@ CAMINHO_PLANILHA_STATUS = os.path.join(CAMINHO_PASTA_EXCEL, NOME_ARQUIVO_STATUS)
 COLUNA_PEDIDO_ID, COLUNA_PV, COLUNA_SERVICO, COLUNA_STATUS, COLUNA_DATA_STATUS, COLUNA_QTD = 'Pedido', 'PV', 'Servico', 'Status', 'Data Status', 'Qtd Maquinas'
 STATUS_PENDENTE, STATUS_AGUARDANDO, STATUS_AGUARDANDO_CHEGADA, STATUS_EM_MONTAGEM, STATUS_CONCLUIDO, STATUS_CANCELADO = 'Pendente', 'Aguardando Montagem', 'Aguardando Chegada', 'Em Montagem', 'Concluído', 'Cancelado'
 INTERVALO_CHECK_MS = 5000
+# Com o QFileSystemWatcher ativo, a atualização é disparada pelo salvamento da planilha; o polling
+# continua só como reserva (compartilhamentos de rede nem sempre avisam mudanças).
+INTERVALO_FALLBACK_MS = 60000
+ESPERA_SALVAMENTO_MS = 400  # agrupa a rajada de eventos do Excel (arquivo temporário + renomear)
+ESPERA_NOVA_TENTATIVA_MS = 1000; MAX_TENTATIVAS_LEITURA = 3  # arquivo ainda sendo gravado/travado
+ROLAGEM_AUTOMATICA_MS = 8000  # listas maiores que a tela avançam uma página a cada X ms (0 desliga)
+CARDS_PRIORIDADE = 4  # os demais pedidos "Aguardando Montagem"/"Em Montagem" seguem na lista "Aguardando Montagem"
+STATUS_FINALIZADOS = (STATUS_CONCLUIDO, STATUS_CANCELADO)
+# Fica na pasta do programa (disco local), não em "dados", que pode estar num compartilhamento de rede.
+CAMINHO_HISTORICO = os.path.join(script_dir, "historico_pedidos.sqlite3")
+COLUNA_LINHA = 'Linha'  # opcional na planilha: linha de montagem do pedido
+# Opcional: várias planilhas/abas e vários painéis (um por tela) no mesmo processo. Ver README.
+CAMINHO_CONFIG_PAINEIS = os.path.join(script_dir, "paineis.json")
+# Tempos por etapa e contadores de cada atualização (F12 mostra na tela). O .prom segue o formato texto do
+# Prometheus (pode ser lido pelo textfile collector do node_exporter).
+CAMINHO_LOG_METRICAS = os.path.join(script_dir, "painel_metricas.log")  # rotativo: 3 arquivos de 1 MB
+CAMINHO_METRICAS_PROM = os.path.join(script_dir, "painel_metricas.prom")
+ATUALIZACAO_LENTA_MS = 2000  # atualizações mais lentas que isso entram no log como aviso
+# Modo sem interface (python prioridades.py --servidor [porta]): serve os snapshots em JSON para outras telas da rede.
+HOST_SERVIDOR, PORTA_SERVIDOR = "0.0.0.0", 8765
+# O servidor pode rodar junto com um painel na mesma pasta: histórico, log e .prom dele ganham o sufixo "_servidor"
+# (historico_pedidos_servidor.sqlite3, ...) para um não misturar ou sobrescrever as métricas do outro.
+def caminho_servidor(caminho):
+    base, extensao = os.path.splitext(caminho)
+    return f"{base}_servidor{extensao}"
+# Último snapshot de cada painel, regravado a cada atualização. Na partida a janela abre com ele (marcado como
+# desatualizado) enquanto a primeira leitura da planilha roda.
+CAMINHO_ULTIMO_SNAPSHOT = os.path.join(script_dir, "ultimo_snapshot.json")
+
+# --- INSTRUMENTAÇÃO ---
+class MetricasPainel:
+    """Tempo de cada etapa da atualização e contadores. As etapas da carga rodam na thread de segundo plano e o
+    desenho na da interface; `fechar_atualizacao` (chamado pelo coordenador depois do desenho) consolida e exporta."""
+    ETAPAS = ("hash", "leitura", "historico", "filtro", "agregacao", "metricas", "grafico", "snapshot", "persistencia", "desenho")
+    CONTADORES = ("atualizacoes", "sem_mudanca", "agrupadas", "canceladas", "erros", "widgets_criados")
+
+    def __init__(self):
+        self.trava = threading.Lock(); self.atual = {}
+        self.ultima = {}; self.soma = {}; self.execucoes = {}; self.maxima = {}
+        self.contadores = dict.fromkeys(self.CONTADORES, 0); self.widgets = 0; self.ultima_total = None; self.ultima_em = None; self.primeiro_quadro = None
+        self.log = logging.getLogger("painel"); self.caminho_prom = None
+
+    def configurar(self, caminho_log=CAMINHO_LOG_METRICAS, caminho_prom=CAMINHO_METRICAS_PROM):
+        if caminho_log:
+            handler = logging.handlers.RotatingFileHandler(caminho_log, maxBytes=1_000_000, backupCount=3, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+            self.log.addHandler(handler); self.log.setLevel(logging.INFO)
+        self.caminho_prom = caminho_prom
+
+    @contextmanager
+    def etapa(self, nome):
+        inicio = time.perf_counter()
+        try: yield
+        finally:
+            duracao = time.perf_counter() - inicio
+            with self.trava: self.atual[nome] = self.atual.get(nome, 0.0) + duracao
+
+    def contar(self, nome, n=1):
+        with self.trava: self.contadores[nome] += n
+
+    def registrar_primeiro_quadro(self, segundos, com_snapshot_salvo):
+        self.primeiro_quadro = segundos
+        self.log.info("primeiro quadro em %.0f ms (%s snapshot salvo)", segundos * 1000, "com" if com_snapshot_salvo else "sem")
+        self.exportar()
+
+    def registrar_widgets(self, total):
+        # Com os widgets persistentes o total fica estável; qualquer crescimento é alocação nova.
+        with self.trava: self.contadores["widgets_criados"] += max(0, total - self.widgets); self.widgets = total
+
+    def fechar_atualizacao(self, situacao, duracao_total, erro=""):
+        """situacao: "atualizacoes", "sem_mudanca", "canceladas" ou "erros"."""
+        with self.trava:
+            etapas, self.atual = self.atual, {}
+            for nome, duracao in etapas.items():
+                self.ultima[nome] = duracao; self.soma[nome] = self.soma.get(nome, 0.0) + duracao
+                self.execucoes[nome] = self.execucoes.get(nome, 0) + 1; self.maxima[nome] = max(self.maxima.get(nome, 0.0), duracao)
+            self.contadores[situacao] += 1; self.ultima_total = duracao_total; self.ultima_em = time.time()
+        detalhes = " ".join(f"{nome}={etapas[nome] * 1000:.0f}ms" for nome in self.ETAPAS if nome in etapas)
+        if erro: self.log.error("atualizacao com erro em %.0f ms: %s", duracao_total * 1000, erro)
+        elif duracao_total * 1000 > ATUALIZACAO_LENTA_MS: self.log.warning("atualizacao lenta %.0f ms (%s) %s", duracao_total * 1000, situacao, detalhes)
+        elif situacao == "atualizacoes": self.log.info("atualizacao %.0f ms %s widgets=%d", duracao_total * 1000, detalhes, self.widgets)
+        self.exportar()
+
+    def texto_prometheus(self):
+        with self.trava:
+            linhas = ["# HELP painel_etapa_ultima_segundos Duração da etapa na última atualização em que rodou.", "# TYPE painel_etapa_ultima_segundos gauge"]
+            linhas += [f'painel_etapa_ultima_segundos{{etapa="{nome}"}} {valor:.6f}' for nome, valor in self.ultima.items()]
+            linhas += ["# HELP painel_etapa_maxima_segundos Maior duração da etapa desde que o painel abriu.", "# TYPE painel_etapa_maxima_segundos gauge"]
+            linhas += [f'painel_etapa_maxima_segundos{{etapa="{nome}"}} {valor:.6f}' for nome, valor in self.maxima.items()]
+            linhas += ["# HELP painel_etapa_segundos Tempo acumulado por etapa.", "# TYPE painel_etapa_segundos summary"]
+            for nome in self.soma:
+                linhas += [f'painel_etapa_segundos_sum{{etapa="{nome}"}} {self.soma[nome]:.6f}', f'painel_etapa_segundos_count{{etapa="{nome}"}} {self.execucoes[nome]}']
+            for nome, valor in self.contadores.items():
+                linhas += [f"# TYPE painel_{nome}_total counter", f"painel_{nome}_total {valor}"]
+            linhas += ["# TYPE painel_widgets gauge", f"painel_widgets {self.widgets}"]
+            if self.primeiro_quadro is not None: linhas += ["# TYPE painel_primeiro_quadro_segundos gauge", f"painel_primeiro_quadro_segundos {self.primeiro_quadro:.6f}"]
+            if self.ultima_total is not None:
+                linhas += ["# TYPE painel_ultima_atualizacao_segundos gauge", f"painel_ultima_atualizacao_segundos {self.ultima_total:.6f}",
+                           "# TYPE painel_ultima_atualizacao_timestamp_seconds gauge", f"painel_ultima_atualizacao_timestamp_seconds {self.ultima_em:.0f}"]
+        return "\n".join(linhas) + "\n"
+
+    def exportar(self):
+        if not self.caminho_prom: return
+        # Grava num temporário e renomeia: quem lê o arquivo nunca pega uma escrita pela metade.
+        temporario = self.caminho_prom + ".tmp"
+        try:
+            with open(temporario, "w", encoding="utf-8") as f: f.write(self.texto_prometheus())
+            os.replace(temporario, self.caminho_prom)
+        except OSError as e: self.log.warning("não foi possível gravar %s: %s", self.caminho_prom, e)
+
+    def texto_overlay(self):
+        with self.trava:
+            linhas = ["última atualização: " + (f"{self.ultima_total * 1000:.0f} ms" if self.ultima_total is not None else "-"),
+                      f"{'etapa':<10} {'última':>9} {'média':>9} {'máxima':>9}"]
+            for nome in self.ETAPAS:
+                if nome in self.ultima:
+                    linhas.append(f"{nome:<10} {self.ultima[nome] * 1000:7.1f}ms {self.soma[nome] / self.execucoes[nome] * 1000:7.1f}ms {self.maxima[nome] * 1000:7.1f}ms")
+            linhas += [f"{nome:<16} {valor}" for nome, valor in self.contadores.items()] + [f"{'widgets':<16} {self.widgets}"]
+            if self.primeiro_quadro is not None: linhas.append(f"{'primeiro quadro':<16} {self.primeiro_quadro * 1000:.0f} ms")
+        return "\n".join(linhas)
+
+METRICAS = MetricasPainel()
+
+# --- LEITURA DA PLANILHA ---
+# Só as colunas que o painel usa. "auto" usa o python-calamine se estiver instalado (bem mais rápido) e, sem ele,
+# o openpyxl em modo read-only (streaming, sem carregar macros nem o arquivo inteiro na memória).
+COLUNAS_PLANILHA = (COLUNA_PEDIDO_ID, COLUNA_PV, COLUNA_SERVICO, COLUNA_STATUS, COLUNA_DATA_STATUS, COLUNA_QTD, COLUNA_LINHA)
+LEITOR_PLANILHA = "auto"  # "auto", "calamine", "openpyxl" ou "pandas"
+# Cópia da leitura em Feather (precisa do pyarrow), identificada pelo hash da planilha: evita reler a .xlsm
+# ao abrir o programa ou na virada do dia quando a planilha não mudou.
+PASTA_CACHE_LEITURA = os.path.join(script_dir, "cache")
+
+def ler_planilha_openpyxl(caminho, aba=0):
+    import openpyxl
+    wb = openpyxl.load_workbook(caminho, read_only=True, data_only=True, keep_links=False)
+    try:
+        linhas = (wb[aba] if isinstance(aba, str) else wb.worksheets[aba]).iter_rows(values_only=True)
+        cabecalho = [str(c).strip() if c is not None else "" for c in next(linhas, ())]
+        indices = {}
+        for i, nome in enumerate(cabecalho):
+            if nome in COLUNAS_PLANILHA and nome not in indices: indices[nome] = i
+        # Linhas vazias no meio da planilha entram (como nos outros leitores); só as que sobram depois da última
+        # linha com dados são descartadas. Por isso a sequência de vazias fica pendente até aparecer um dado.
+        colunas = {nome: [] for nome in indices}; vazias = 0
+        for linha in linhas:
+            valores = [linha[i] if i < len(linha) else None for i in indices.values()]
+            if all(v is None for v in valores):
+                vazias += 1; continue
+            if vazias:
+                for lista in colunas.values(): lista.extend([None] * vazias)
+                vazias = 0
+            for lista, valor in zip(colunas.values(), valores): lista.append(valor)
+        return pd.DataFrame(colunas)
+    finally:
+        wb.close()
+
+def ler_planilha_pandas(caminho, aba=0, engine=None):
+    return pd.read_excel(caminho, sheet_name=aba, engine=engine, usecols=lambda c: str(c).strip() in COLUNAS_PLANILHA)
+
+LEITORES_PLANILHA = {"openpyxl": ler_planilha_openpyxl, "pandas": ler_planilha_pandas,
+                     "calamine": lambda caminho, aba=0: ler_planilha_pandas(caminho, aba, engine="calamine")}
+
+def modulo_disponivel(nome):
+    return importlib.util.find_spec(nome) is not None
+
+def escolher_leitor():
+    if LEITOR_PLANILHA != "auto": return LEITORES_PLANILHA[LEITOR_PLANILHA]
+    return LEITORES_PLANILHA["calamine" if modulo_disponivel("python_calamine") else "openpyxl"]
+
+def normalizar_leitura(df):
+    # Todos os leitores entregam os mesmos tipos: texto como str (vazio = NaN), datas e quantidades já convertidas.
+    df.columns = [str(c).strip() for c in df.columns]
+    for col in (COLUNA_PEDIDO_ID, COLUNA_PV, COLUNA_SERVICO, COLUNA_STATUS, COLUNA_LINHA):
+        if col in df.columns: df[col] = df[col].where(df[col].isna(), df[col].astype(str)).astype(object)
+    if COLUNA_DATA_STATUS in df.columns: df[COLUNA_DATA_STATUS] = pd.to_datetime(df[COLUNA_DATA_STATUS], errors='coerce')
+    if COLUNA_QTD in df.columns: df[COLUNA_QTD] = pd.to_numeric(df[COLUNA_QTD], errors='coerce')
+    return df.reset_index(drop=True)
+
+def nome_cache_leitura(hash_conteudo, aba):
+    return f"status_{hash_conteudo}_{aba}.feather"
+
+def ler_planilha(caminho, hash_conteudo=None, aba=0):
+    caminho_cache = None
+    if hash_conteudo and modulo_disponivel("pyarrow"):
+        caminho_cache = os.path.join(PASTA_CACHE_LEITURA, nome_cache_leitura(hash_conteudo, aba))
+        if os.path.exists(caminho_cache):
+            try: return pd.read_feather(caminho_cache)
+            except Exception as e: print(f"Aviso: cache da planilha ilegível ({e}); relendo a planilha.")
+    df = normalizar_leitura(escolher_leitor()(caminho, aba))
+    if caminho_cache: salvar_cache_leitura(df, caminho_cache)
+    return df
+
+def salvar_cache_leitura(df, caminho_cache):
+    try:
+        os.makedirs(PASTA_CACHE_LEITURA, exist_ok=True)
+        temporario = caminho_cache + ".tmp"; df.to_feather(temporario); os.replace(temporario, caminho_cache)
+    except Exception as e:
+        print(f"Aviso: não foi possível salvar o cache da planilha ({e}).")
+
+def podar_cache_leitura(validos):
+    if not os.path.isdir(PASTA_CACHE_LEITURA): return
+    for nome in os.listdir(PASTA_CACHE_LEITURA):
+        if nome.startswith("status_") and nome not in validos:
+            try: os.remove(os.path.join(PASTA_CACHE_LEITURA, nome))
+            except OSError: pass
+
+# --- FONTES E FILTROS (uma leitura, vários painéis) ---
+class FontePlanilha(NamedTuple):
+    caminho: str
+    aba: object = 0  # nome ou posição da aba
+    linha: str = ""  # linha de montagem dos pedidos desta aba quando ela não tem a coluna "Linha"
+
+class FiltroPainel(NamedTuple):
+    pv: tuple = ()      # "TERAVIX" e/ou "PV"; vazio = todos
+    linhas: tuple = ()  # linhas de montagem; vazio = todas
+    status: tuple = ()  # status exibidos nas listas; vazio = todos (não afeta os indicadores de produção)
+
+FONTES_PADRAO = (FontePlanilha(CAMINHO_PLANILHA_STATUS),)
+SEM_FILTRO = FiltroPainel()
+
+def carregar_configuracao(caminho=CAMINHO_CONFIG_PAINEIS):
+    """Lê o paineis.json (opcional). Sem ele, um único painel sem filtro sobre a planilha padrão."""
+    padrao = (FONTES_PADRAO, [{"titulo": "", "tela": 0, "filtro": SEM_FILTRO}])
+    if not os.path.exists(caminho): return padrao
+    try:
+        with open(caminho, encoding='utf-8') as f: config = json.load(f)
+        fontes = tuple(FontePlanilha(os.path.join(script_dir, fonte["planilha"]), fonte.get("aba", 0), str(fonte.get("linha", "")))
+                       for fonte in config.get("fontes", [])) or FONTES_PADRAO
+        paineis = [{"titulo": str(painel.get("titulo", "")), "tela": int(painel.get("tela", i)),
+                    "filtro": FiltroPainel(*(tuple(str(v) for v in painel.get(campo, ())) for campo in FiltroPainel._fields))}
+                   for i, painel in enumerate(config.get("paineis", []))] or padrao[1]
+        return fontes, paineis
+    except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+        print(f"Aviso: configuração '{caminho}' inválida ({e}); usando um painel padrão.")
+        return padrao
 
 # --- LÓGICA DE DADOS ---
-def carregar_dados():
-    if not os.path.exists(CAMINHO_PLANILHA_STATUS):
-        raise FileNotFoundError(f"Arquivo de dados não encontrado: {CAMINHO_PLANILHA_STATUS}")
-    df = pd.read_excel(CAMINHO_PLANILHA_STATUS, parse_dates=[COLUNA_DATA_STATUS])
-    df.columns = df.columns.str.strip()
-    
+def preparar_dados(df, fonte):
     for col, default_val in [(COLUNA_PV, "TERAVIX"), (COLUNA_SERVICO, "Detalhe não disponível"), (COLUNA_QTD, 0)]:
         if col not in df.columns: df[col] = default_val
         else:
@@ -51,32 +318,405 @@ def carregar_dados():
             else:
                 df[col] = df[col].astype(object).fillna(default_val)
     df[COLUNA_QTD] = df[COLUNA_QTD].astype(int)
+    df[COLUNA_LINHA] = df[COLUNA_LINHA].fillna(fonte.linha).astype(str) if COLUNA_LINHA in df.columns else fonte.linha
 
     df[COLUNA_PEDIDO_ID] = df[COLUNA_PEDIDO_ID].astype(str)
     df = df[df[COLUNA_PEDIDO_ID].str.startswith('CV-')].copy()
     df.reset_index(drop=True, inplace=True); df['Prioridade'] = df.index + 2
-    df_principal = df[~df[COLUNA_STATUS].isin([STATUS_CONCLUIDO, STATUS_CANCELADO])].copy()
-    hoje = datetime.now().date()
-    df_concluidos_hoje = df[(df[COLUNA_STATUS] == STATUS_CONCLUIDO) & (pd.to_datetime(df[COLUNA_DATA_STATUS]).dt.date == hoje)].sort_values(by=COLUNA_DATA_STATUS, ascending=False)
-    df_cancelados_hoje = df[(df[COLUNA_STATUS] == STATUS_CANCELADO) & (pd.to_datetime(df[COLUNA_DATA_STATUS]).dt.date == hoje)].sort_values(by=COLUNA_DATA_STATUS, ascending=False)
-    
-    teravix_concluidos = len(df_concluidos_hoje[df_concluidos_hoje[COLUNA_PV] == 'TERAVIX'])
-    pv_concluidos = len(df_concluidos_hoje[df_concluidos_hoje[COLUNA_PV] != 'TERAVIX'])
-    total_concluidos = len(df_concluidos_hoje)
-    teravix_concluidos_qtd = df_concluidos_hoje[df_concluidos_hoje[COLUNA_PV] == 'TERAVIX'][COLUNA_QTD].sum()
-    pv_concluidos_qtd = df_concluidos_hoje[df_concluidos_hoje[COLUNA_PV] != 'TERAVIX'][COLUNA_QTD].sum()
-    total_concluidos_qtd = df_concluidos_hoje[COLUNA_QTD].sum()
-
-    teravix_cancelados = len(df_cancelados_hoje[df_cancelados_hoje[COLUNA_PV] == 'TERAVIX'])
-    pv_cancelados = len(df_cancelados_hoje[df_cancelados_hoje[COLUNA_PV] != 'TERAVIX'])
-    total_cancelados = len(df_cancelados_hoje)
-    teravix_cancelados_qtd = df_cancelados_hoje[df_cancelados_hoje[COLUNA_PV] == 'TERAVIX'][COLUNA_QTD].sum()
-    pv_cancelados_qtd = df_cancelados_hoje[df_cancelados_hoje[COLUNA_PV] != 'TERAVIX'][COLUNA_QTD].sum()
-    total_cancelados_qtd = df_cancelados_hoje[COLUNA_QTD].sum()
-
-    return df, df_principal, df_concluidos_hoje, df_cancelados_hoje, \
-           (teravix_concluidos, pv_concluidos, total_concluidos, teravix_concluidos_qtd, pv_concluidos_qtd, total_concluidos_qtd), \
-           (teravix_cancelados, pv_cancelados, total_cancelados, teravix_cancelados_qtd, pv_cancelados_qtd, total_cancelados_qtd)
+    # Datas já convertidas na leitura; 'Dia' (meia-noite) serve de chave para todas as agregações.
+    df['Dia'] = df[COLUNA_DATA_STATUS].dt.normalize()
+    return df
+
+def carregar_dados(fontes=FONTES_PADRAO, hashes=None):
+    """Lê e prepara todas as fontes uma única vez; cada painel só filtra este DataFrame."""
+    partes = []
+    for i, fonte in enumerate(fontes):
+        if not os.path.exists(fonte.caminho):
+            raise FileNotFoundError(f"Arquivo de dados não encontrado: {fonte.caminho}")
+        with METRICAS.etapa("leitura"): partes.append(preparar_dados(ler_planilha(fonte.caminho, hashes[i] if hashes else None, fonte.aba), fonte))
+    return pd.concat(partes, ignore_index=True) if len(partes) > 1 else partes[0]
+
+def filtrar_pedidos(df, filtro):
+    mascara = np.ones(len(df), dtype=bool)
+    if filtro.pv: mascara &= np.isin(np.where(df[COLUNA_PV] == 'TERAVIX', 'TERAVIX', 'PV'), filtro.pv)
+    if filtro.linhas: mascara &= df[COLUNA_LINHA].isin(filtro.linhas).to_numpy()
+    return df if mascara.all() else df[mascara]
+
+def dados_do_painel(df, filtro=SEM_FILTRO, agora=None, usar_historico=True):
+    agora = agora or datetime.now()
+    with METRICAS.etapa("filtro"):
+        df = filtrar_pedidos(df, filtro)
+        df_listas = df[df[COLUNA_STATUS].isin(filtro.status)] if filtro.status else df
+        df_principal = df_listas[~df_listas[COLUNA_STATUS].isin(STATUS_FINALIZADOS)].copy()
+        hoje = pd.Timestamp(agora.date())
+        df_concluidos_hoje = df_listas[(df_listas[COLUNA_STATUS] == STATUS_CONCLUIDO) & (df_listas['Dia'] == hoje)].sort_values(by=COLUNA_DATA_STATUS, ascending=False)
+        df_cancelados_hoje = df_listas[(df_listas[COLUNA_STATUS] == STATUS_CANCELADO) & (df_listas['Dia'] == hoje)].sort_values(by=COLUNA_DATA_STATUS, ascending=False)
+    with METRICAS.etapa("agregacao"): resumo = agregar_producao(df, filtro, agora, usar_historico)
+    return df_principal, df_concluidos_hoje, df_cancelados_hoje, resumo
+
+# --- AGREGAÇÃO DOS INDICADORES ---
+class ResumoProducao(NamedTuple):
+    totais_concluidos_hoje: tuple  # (teravix, pv, total, teravix_qtd, pv_qtd, total_qtd)
+    totais_cancelados_hoje: tuple
+    total_mes_atual: int
+    total_mes_atual_qtd: int
+    dias_uteis_mes_atual: int
+    total_mes_anterior: int
+    dias_uteis_mes_anterior: int
+    recorde_dia_valor: int
+    recorde_dia_data: str
+    recorde_dia_qtd: int
+    semanal: tuple  # ((inicio da semana, qtd máquinas), ...) das últimas 4 semanas
+
+def totais_do_dia(por_dia, status, dia):
+    g = por_dia[(por_dia[COLUNA_STATUS] == status) & (por_dia['Dia'] == dia)]
+    teravix = g[g['Teravix']]; pv = g[~g['Teravix']]
+    return (int(teravix['pedidos'].sum()), int(pv['pedidos'].sum()), int(g['pedidos'].sum()),
+            int(teravix['qtd'].sum()), int(pv['qtd'].sum()), int(g['qtd'].sum()))
+
+def janela_indicadores(agora):
+    hoje = pd.Timestamp(agora.date()); inicio_mes_atual = hoje.replace(day=1)
+    fim_mes_anterior = inicio_mes_atual - timedelta(days=1); inicio_mes_anterior = fim_mes_anterior.replace(day=1)
+    semanas_recentes = pd.date_range(end=agora, periods=4, freq='W-MON').normalize()
+    return hoje, inicio_mes_atual, inicio_mes_anterior, fim_mes_anterior, semanas_recentes
+
+def agrupar_producao(df):
+    """Produção por (status, dia, TERAVIX/PV) direto da planilha, num único groupby sobre os pedidos finalizados."""
+    finalizados = df[df[COLUNA_STATUS].isin(STATUS_FINALIZADOS) & df['Dia'].notna()]
+    return (finalizados.groupby([finalizados[COLUNA_STATUS], finalizados['Dia'], (finalizados[COLUNA_PV] == 'TERAVIX').rename('Teravix')])[COLUNA_QTD]
+            .agg(pedidos='size', qtd='sum').reset_index())
+
+def resumir_producao(por_dia, agora):
+    """Todos os indicadores saem da tabela pequena de produção por dia, sem tocar no DataFrame completo."""
+    hoje, inicio_mes_atual, inicio_mes_anterior, fim_mes_anterior, semanas_recentes = janela_indicadores(agora)
+    concluidos = por_dia[por_dia[COLUNA_STATUS] == STATUS_CONCLUIDO].groupby('Dia')[['pedidos', 'qtd']].sum()
+    concluidos = concluidos[concluidos['pedidos'] != 0]
+
+    mes_atual = concluidos.loc[inicio_mes_atual:hoje]; mes_anterior = concluidos.loc[inicio_mes_anterior:fim_mes_anterior]
+    dias_uteis_mes_atual = int(np.busday_count(inicio_mes_atual.date(), (hoje + timedelta(days=1)).date()))
+    dias_uteis_mes_anterior = int(np.busday_count(inicio_mes_anterior.date(), inicio_mes_atual.date()))
+
+    recorde_dia_valor = 0; recorde_dia_data = ""; recorde_dia_qtd = 0
+    if not mes_atual.empty:
+        recorde_dia = mes_atual['pedidos'].idxmax()
+        recorde_dia_valor = int(mes_atual.at[recorde_dia, 'pedidos']); recorde_dia_qtd = int(mes_atual.at[recorde_dia, 'qtd'])
+        recorde_dia_data = recorde_dia.strftime('%d/%m/%Y')
+
+    # Sempre as 4 semanas, mesmo sem nenhum concluído na janela (barras zeradas em vez de gráfico sumindo).
+    por_semana = pd.Series(dtype='int64')
+    if not concluidos.empty:
+        inicio_semana = concluidos.index - pd.to_timedelta(concluidos.index.weekday, unit='D')
+        por_semana = concluidos['qtd'].groupby(inicio_semana).sum()
+    semanal = tuple((semana, int(qtd)) for semana, qtd in por_semana.reindex(semanas_recentes, fill_value=0).items())
+
+    return ResumoProducao(totais_do_dia(por_dia, STATUS_CONCLUIDO, hoje), totais_do_dia(por_dia, STATUS_CANCELADO, hoje),
+                          int(mes_atual['pedidos'].sum()), int(mes_atual['qtd'].sum()), dias_uteis_mes_atual,
+                          int(mes_anterior['pedidos'].sum()), dias_uteis_mes_anterior,
+                          recorde_dia_valor, recorde_dia_data, recorde_dia_qtd, semanal)
+
+def registrar_historico(df):
+    try:
+        HISTORICO.registrar(df); return True
+    except (sqlite3.Error, OSError) as e:
+        print(f"Aviso: histórico de pedidos indisponível ({e}); calculando direto da planilha.")
+        return False
+
+def agregar_producao(df, filtro=SEM_FILTRO, agora=None, usar_historico=True):
+    # Lê do histórico só a janela de dias que os indicadores usam (~2 meses), então o custo não cresce
+    # com o histórico. Sem o histórico, agrupa a planilha (já filtrada) inteira.
+    agora = agora or datetime.now()
+    _, _, inicio_mes_anterior, _, semanas_recentes = janela_indicadores(agora)
+    por_dia = None
+    if usar_historico:
+        try: por_dia = HISTORICO.producao_por_dia(min(inicio_mes_anterior, semanas_recentes[0]), filtro)
+        except (sqlite3.Error, OSError) as e: print(f"Aviso: histórico de pedidos indisponível ({e}); calculando direto da planilha.")
+    if por_dia is None: por_dia = agrupar_producao(df)
+    return resumir_producao(por_dia, agora)
+
+# --- HISTÓRICO DE EVENTOS (SQLite) ---
+class HistoricoPedidos:
+    """Registro append-only das mudanças de pedidos lidas da planilha. A produção por (status, dia, TERAVIX/PV, linha)
+    é mantida de forma incremental: cada mudança desfaz a contribuição antiga do pedido e soma a nova."""
+    CAMPOS = ('status', 'data_status', 'pv', 'qtd', 'linha')
+
+    def __init__(self, caminho=CAMINHO_HISTORICO):
+        # estado: cópia em memória de estado_pedidos, válida enquanto o user_version do banco for igual a versao.
+        self.caminho = caminho; self.conexao = None; self.estado = None; self.versao = None; self.trava = threading.Lock()
+
+    def conectar(self):
+        if self.conexao is None:
+            conexao = sqlite3.connect(self.caminho, check_same_thread=False)
+            conexao.executescript("""
+                PRAGMA journal_mode=WAL;
+                CREATE TABLE IF NOT EXISTS eventos (id INTEGER PRIMARY KEY, registrado_em TEXT NOT NULL, pedido TEXT NOT NULL,
+                                                    status TEXT, data_status TEXT, pv TEXT, qtd INTEGER, linha TEXT NOT NULL DEFAULT '');
+                CREATE TABLE IF NOT EXISTS estado_pedidos (pedido TEXT PRIMARY KEY, status TEXT, data_status TEXT, pv TEXT, qtd INTEGER,
+                                                           linha TEXT NOT NULL DEFAULT '');
+            """)
+            if 'linha' not in {coluna[1] for coluna in conexao.execute("PRAGMA table_info(estado_pedidos)")}:
+                # Históricos criados antes da coluna "linha": acrescenta a coluna e refaz a produção por dia a partir do estado.
+                conexao.executescript("""
+                    BEGIN;
+                    ALTER TABLE eventos ADD COLUMN linha TEXT NOT NULL DEFAULT '';
+                    ALTER TABLE estado_pedidos ADD COLUMN linha TEXT NOT NULL DEFAULT '';
+                    DROP TABLE IF EXISTS producao_dia;
+                    COMMIT;
+                """)
+            if not conexao.execute("SELECT 1 FROM sqlite_master WHERE name = 'producao_dia'").fetchone():
+                conexao.executescript(f"""
+                    BEGIN;
+                    CREATE TABLE producao_dia (status TEXT, dia TEXT, teravix INTEGER, linha TEXT, pedidos INTEGER NOT NULL, qtd INTEGER NOT NULL,
+                                               PRIMARY KEY (status, dia, teravix, linha));
+                    INSERT INTO producao_dia SELECT status, substr(data_status, 1, 10), pv = 'TERAVIX', linha, COUNT(*), SUM(qtd) FROM estado_pedidos
+                        WHERE status IN ('{STATUS_CONCLUIDO}', '{STATUS_CANCELADO}') AND data_status != '' GROUP BY 1, 2, 3, 4;
+                    COMMIT;
+                """)
+            self.conexao = conexao
+        return self.conexao
+
+    @staticmethod
+    def contribuicao(pedidos, sinal):
+        finalizados = pedidos[pedidos['status'].isin(STATUS_FINALIZADOS) & (pedidos['data_status'] != '')]
+        return pd.DataFrame({'status': finalizados['status'], 'dia': finalizados['data_status'].str[:10], 'teravix': (finalizados['pv'] == 'TERAVIX').astype(int),
+                             'linha': finalizados['linha'], 'pedidos': sinal, 'qtd': finalizados['qtd'].astype(int) * sinal})
+
+    def registrar(self, df):
+        # Pedido repetido na planilha conta uma vez por linha, como no cálculo direto: a 2ª ocorrência vira "CV-1#2".
+        pedidos = df[COLUNA_PEDIDO_ID].astype(str); ocorrencia = pedidos.groupby(pedidos).cumcount()
+        atual = pd.DataFrame({'pedido': pedidos.where(ocorrencia == 0, pedidos + '#' + (ocorrencia + 1).astype(str)),
+                              'status': df[COLUNA_STATUS].fillna('').astype(str),
+                              'data_status': df[COLUNA_DATA_STATUS].dt.strftime('%Y-%m-%d %H:%M:%S').fillna(''),
+                              'pv': df[COLUNA_PV].astype(str), 'qtd': df[COLUNA_QTD].astype(int), 'linha': df[COLUNA_LINHA].astype(str)}
+                             ).set_index('pedido')
+        with self.trava:
+            conexao = self.conectar()
+            # Outro processo de painel na mesma pasta pode usar o mesmo arquivo: a diferença é calculada contra o
+            # estado gravado, dentro de uma transação de escrita. Cada gravação incrementa o user_version; se ele mudou
+            # desde a nossa última leitura, relemos estado_pedidos.
+            conexao.execute("BEGIN IMMEDIATE")
+            try:
+                versao = conexao.execute("PRAGMA user_version").fetchone()[0]
+                if versao != self.versao:
+                    self.estado = pd.read_sql_query(f"SELECT pedido, {', '.join(self.CAMPOS)} FROM estado_pedidos", conexao, index_col='pedido')
+                    self.versao = versao
+                anterior = self.estado.reindex(atual.index)
+                mudou = anterior['status'].isna() | (atual != anterior).any(axis=1)
+                # Pedidos que saíram da planilha (apagados, renomeados) deixam de contar; o evento fica com status nulo.
+                removidos = self.estado.index.difference(atual.index)
+                if not mudou.any() and removidos.empty:
+                    conexao.rollback(); return 0
+                novos = atual[mudou]; antigos = pd.concat([anterior[mudou].dropna(subset=['status']), self.estado.loc[removidos]])
+                chave = ['status', 'dia', 'teravix', 'linha']
+                delta = pd.concat([self.contribuicao(antigos, -1), self.contribuicao(novos, 1)])
+                delta = delta.groupby(chave, as_index=False)[['pedidos', 'qtd']].sum()
+                delta = delta[(delta['pedidos'] != 0) | (delta['qtd'] != 0)]
+                linhas = list(zip(novos.index.tolist(), *(novos[c].tolist() for c in self.CAMPOS)))
+                registrado_em = datetime.now().isoformat(sep=' ', timespec='seconds')
+                conexao.executemany(f"INSERT INTO eventos (registrado_em, pedido, {', '.join(self.CAMPOS)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                    [(registrado_em,) + linha for linha in linhas])
+                conexao.executemany("INSERT INTO eventos (registrado_em, pedido) VALUES (?, ?)", [(registrado_em, pedido) for pedido in removidos])
+                conexao.executemany(f"INSERT OR REPLACE INTO estado_pedidos (pedido, {', '.join(self.CAMPOS)}) VALUES (?, ?, ?, ?, ?, ?)", linhas)
+                conexao.executemany("DELETE FROM estado_pedidos WHERE pedido = ?", [(pedido,) for pedido in removidos])
+                conexao.executemany("""INSERT INTO producao_dia (status, dia, teravix, linha, pedidos, qtd) VALUES (?, ?, ?, ?, ?, ?)
+                                       ON CONFLICT (status, dia, teravix, linha) DO UPDATE SET pedidos = pedidos + excluded.pedidos, qtd = qtd + excluded.qtd""",
+                                    list(zip(*(delta[c].tolist() for c in chave + ['pedidos', 'qtd']))))
+                conexao.execute(f"PRAGMA user_version = {versao + 1}")
+                conexao.commit()
+            except BaseException:
+                conexao.rollback(); self.versao = None; raise
+            self.estado = pd.concat([self.estado.drop(novos.index.union(removidos), errors='ignore'), novos]); self.versao = versao + 1
+            return len(novos) + len(removidos)
+
+    def producao_por_dia(self, desde, filtro=SEM_FILTRO):
+        condicoes = ["dia >= ?"]; parametros = [desde.strftime('%Y-%m-%d')]
+        if filtro.linhas:
+            condicoes.append(f"linha IN ({', '.join('?' * len(filtro.linhas))})"); parametros += list(filtro.linhas)
+        if len(set(filtro.pv)) == 1:
+            condicoes.append("teravix = ?"); parametros.append(int(filtro.pv[0] == 'TERAVIX'))
+        with self.trava:
+            por_dia = pd.read_sql_query(f"""SELECT status, dia, teravix, SUM(pedidos) AS pedidos, SUM(qtd) AS qtd FROM producao_dia
+                                            WHERE {' AND '.join(condicoes)} GROUP BY status, dia, teravix HAVING SUM(pedidos) != 0""",
+                                        self.conectar(), params=parametros)
+        return pd.DataFrame({COLUNA_STATUS: por_dia['status'], 'Dia': pd.to_datetime(por_dia['dia']), 'Teravix': por_dia['teravix'].astype(bool),
+                             'pedidos': por_dia['pedidos'], 'qtd': por_dia['qtd']})
+
+HISTORICO = HistoricoPedidos()
+
+# --- DETECÇÃO DE ALTERAÇÃO DA PLANILHA ---
+# Só relemos as planilhas quando elas realmente mudaram: mtime/tamanho são a checagem barata,
+# o hash do conteúdo confirma (o Excel às vezes regrava o arquivo sem alterar nada).
+# "entregue": o resultado chegou a virar snapshot. Uma carga cancelada no meio não conta, senão a próxima leitura
+# do mesmo conteúdo voltaria com alterado=False e os dados novos nunca seriam desenhados.
+_CACHE_PLANILHA = {"chave": None, "assinaturas": None, "hashes": None, "dia": None, "resultado": None, "entregue": False}
+
+def assinatura_planilha(caminho):
+    st = os.stat(caminho)
+    return (st.st_mtime_ns, st.st_size)
+
+def hash_planilha(caminho):
+    h = hashlib.blake2b(digest_size=16)
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1 << 20), b''): h.update(bloco)
+    return h.hexdigest()
+
+def assinatura_fontes(fontes):
+    assinaturas = []
+    for caminho in dict.fromkeys(f.caminho for f in fontes):
+        try: assinaturas.append(assinatura_planilha(caminho))
+        except OSError: assinaturas.append(None)
+    return tuple(assinaturas)
+
+def hashes_fontes(fontes):
+    # Várias abas da mesma pasta de trabalho compartilham o hash do arquivo.
+    por_caminho = {caminho: hash_planilha(caminho) for caminho in dict.fromkeys(f.caminho for f in fontes)}
+    return tuple(por_caminho[f.caminho] for f in fontes)
+
+class CargaCancelada(Exception):
+    pass
+
+def carregar_dados_com_cache(fontes=FONTES_PADRAO, filtros=(SEM_FILTRO,), cancelado=None):
+    """Retorna ({filtro: (dados, metricas, dados_grafico)}, alterado). As planilhas são lidas e registradas
+    no histórico uma única vez; cada filtro só recorta o resultado. Se nada mudou desde a última leitura
+    (e ainda é o mesmo dia), devolve o resultado em cache com alterado=False, desde que ele já tenha sido entregue."""
+    for fonte in fontes:
+        if not os.path.exists(fonte.caminho):
+            raise FileNotFoundError(f"Arquivo de dados não encontrado: {fonte.caminho}")
+    cache = _CACHE_PLANILHA; agora = datetime.now(); chave = (tuple(fontes), tuple(filtros))
+    assinaturas = assinatura_fontes(fontes)
+    if cache["resultado"] is not None and cache["chave"] == chave and cache["dia"] == agora.date():
+        if assinaturas == cache["assinaturas"]: return cache["resultado"], not cache["entregue"]
+        with METRICAS.etapa("hash"): hashes = hashes_fontes(fontes)
+        if hashes == cache["hashes"]:
+            cache["assinaturas"] = assinaturas
+            return cache["resultado"], not cache["entregue"]
+    else:
+        with METRICAS.etapa("hash"): hashes = hashes_fontes(fontes)
+    df = carregar_dados(fontes, hashes)
+    podar_cache_leitura({nome_cache_leitura(h, fonte.aba) for h, fonte in zip(hashes, fontes)})
+    if cancelado is not None and cancelado(): raise CargaCancelada()
+    with METRICAS.etapa("historico"): usar_historico = registrar_historico(df)
+    resultado = {}
+    for filtro in filtros:
+        dados = dados_do_painel(df, filtro, agora, usar_historico); resumo = dados[-1]
+        with METRICAS.etapa("metricas"): metricas = calcular_metricas_dashboard(resumo)
+        with METRICAS.etapa("grafico"): dados_grafico = calcular_dados_grafico(resumo)
+        resultado[filtro] = (dados, metricas, dados_grafico)
+    cache.update(chave=chave, assinaturas=assinaturas, hashes=hashes, dia=agora.date(), resultado=resultado, entregue=False)
+    return resultado, True
+
+# --- SNAPSHOT IMUTÁVEL ENTREGUE À INTERFACE ---
+class LinhaPedido(NamedTuple):
+    pedido: str
+    pv: str
+    servico: str
+    status: str
+    data_status: object
+    qtd: int
+    prioridade: int
+
+class SnapshotPainel(NamedTuple):
+    principal: tuple
+    concluidos_hoje: tuple
+    cancelados_hoje: tuple
+    totais_concluidos: tuple
+    totais_cancelados: tuple
+    metricas: MappingProxyType
+    dados_grafico: tuple
+    alterado: bool
+
+def linhas_do_dataframe(df):
+    colunas = [df[c].tolist() for c in (COLUNA_PEDIDO_ID, COLUNA_PV, COLUNA_SERVICO, COLUNA_STATUS, COLUNA_DATA_STATUS, COLUNA_QTD, 'Prioridade')]
+    return tuple(LinhaPedido(*valores) for valores in zip(*colunas))
+
+def gerar_snapshots(fontes=FONTES_PADRAO, filtros=(SEM_FILTRO,), cancelado=None):
+    resultado, alterado = carregar_dados_com_cache(fontes, filtros, cancelado)
+    snapshots = {}
+    for filtro, ((df_principal, df_concluidos, df_cancelados, resumo), metricas, dados_grafico) in resultado.items():
+        if cancelado is not None and cancelado(): raise CargaCancelada()
+        with METRICAS.etapa("snapshot"):
+            snapshots[filtro] = SnapshotPainel(linhas_do_dataframe(df_principal), linhas_do_dataframe(df_concluidos), linhas_do_dataframe(df_cancelados),
+                                               resumo.totais_concluidos_hoje, resumo.totais_cancelados_hoje, MappingProxyType(dict(metricas)), tuple(dados_grafico), alterado)
+    if _CACHE_PLANILHA["resultado"] is resultado: _CACHE_PLANILHA["entregue"] = True
+    return snapshots
+
+def gerar_snapshot(filtro=SEM_FILTRO, fontes=FONTES_PADRAO, cancelado=None):
+    return gerar_snapshots(fontes, (filtro,), cancelado)[filtro]
+
+# --- SNAPSHOT EM JSON (modo servidor e cache do primeiro quadro) ---
+CAMPOS_TOTAIS = ("teravix", "pv", "total", "teravix_qtd", "pv_qtd", "total_qtd")
+
+def valor_json(valor):
+    if valor is None or valor is pd.NaT or (isinstance(valor, float) and valor != valor): return None
+    if isinstance(valor, datetime): return valor.isoformat(timespec="seconds")
+    if isinstance(valor, np.generic): return valor_json(valor.item())
+    return valor
+
+def snapshot_para_dict(snapshot):
+    linhas = lambda pedidos: [{campo: valor_json(valor) for campo, valor in linha._asdict().items()} for linha in pedidos]
+    totais = lambda valores: dict(zip(CAMPOS_TOTAIS, map(valor_json, valores)))
+    return {"principal": linhas(snapshot.principal), "concluidos_hoje": linhas(snapshot.concluidos_hoje), "cancelados_hoje": linhas(snapshot.cancelados_hoje),
+            "totais_concluidos": totais(snapshot.totais_concluidos), "totais_cancelados": totais(snapshot.totais_cancelados),
+            "metricas": {chave: valor_json(valor) for chave, valor in snapshot.metricas.items()},
+            "grafico": [{"semana": valor_json(semana), "valor": valor_json(valor)} for semana, valor in snapshot.dados_grafico],
+            "meta_semanal": META_SEMANAL, "frase_do_dia": obter_frase_do_dia()}
+
+def snapshot_do_dict(dados):
+    """Inverso de snapshot_para_dict, sem pandas: serve para desenhar a janela antes de o pandas ser importado."""
+    data = lambda valor: datetime.fromisoformat(valor) if valor else None
+    linhas = lambda pedidos: tuple(LinhaPedido(**{**linha, "data_status": data(linha["data_status"])}) for linha in pedidos)
+    totais = lambda valores: tuple(valores[campo] for campo in CAMPOS_TOTAIS)
+    return SnapshotPainel(linhas(dados["principal"]), linhas(dados["concluidos_hoje"]), linhas(dados["cancelados_hoje"]),
+                          totais(dados["totais_concluidos"]), totais(dados["totais_cancelados"]), MappingProxyType(dict(dados["metricas"])),
+                          tuple((data(barra["semana"]), barra["valor"]) for barra in dados["grafico"]), True)
+
+def chave_filtro(filtro):
+    return json.dumps(filtro, ensure_ascii=False)
+
+def salvar_ultimo_snapshot(snapshots, caminho=CAMINHO_ULTIMO_SNAPSHOT):
+    dados = {"gravado_em": datetime.now().isoformat(timespec="seconds"),
+             "paineis": {chave_filtro(filtro): snapshot_para_dict(snapshot) for filtro, snapshot in snapshots.items()}}
+    temporario = caminho + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as f: json.dump(dados, f, ensure_ascii=False)
+    os.replace(temporario, caminho)
+
+def carregar_ultimo_snapshot(caminho=CAMINHO_ULTIMO_SNAPSHOT):
+    """Retorna ({chave_filtro: snapshot}, gravado_em), ou ({}, None) se não houver snapshot salvo válido."""
+    try:
+        with open(caminho, encoding="utf-8") as f: dados = json.load(f)
+        return {chave: snapshot_do_dict(snapshot) for chave, snapshot in dados["paineis"].items()}, datetime.fromisoformat(dados["gravado_em"])
+    except FileNotFoundError: return {}, None
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"Aviso: snapshot salvo '{caminho}' ignorado ({e}).")
+        return {}, None
+
+# --- CARGA EM SEGUNDO PLANO ---
+class SinaisCarga(QObject):
+    # (id da carga, {filtro: snapshot} ou None, mensagem de erro ou "")
+    finalizada = Signal(int, object, str)
+
+class TarefaCarga(QRunnable):
+    """Lê e agrega as planilhas fora da thread da interface. Sempre emite `finalizada`, mesmo se cancelada."""
+    def __init__(self, id_carga, sinais, fontes, filtros):
+        super().__init__()
+        self.id_carga = id_carga; self.sinais = sinais; self.fontes = fontes; self.filtros = filtros; self.cancelamento = threading.Event()
+        self.assinatura_inicial = assinatura_fontes(fontes)
+
+    def cancelar(self): self.cancelamento.set()
+
+    def run(self):
+        snapshots, erro = None, ""
+        # O aviso de fim de carga sai em qualquer caso: sem ele o coordenador ficaria esperando e o painel pararia de atualizar.
+        try:
+            try:
+                if not self.cancelamento.is_set(): snapshots = gerar_snapshots(self.fontes, self.filtros, self.cancelamento.is_set)
+            except CargaCancelada: pass
+            except Exception as e: erro = str(e) or e.__class__.__name__
+            if snapshots and any(snapshot.alterado for snapshot in snapshots.values()):
+                try:
+                    with METRICAS.etapa("persistencia"): salvar_ultimo_snapshot(snapshots)
+                except OSError as e: print(f"Aviso: não foi possível salvar o último snapshot ({e}).")
+        finally:
+            self.sinais.finalizada.emit(self.id_carga, snapshots, erro)
 
 def obter_frase_do_dia():
     global FRASE_DO_DIA_ATUAL, ULTIMO_DIA_FRASE
@@ -84,49 +724,20 @@ def obter_frase_do_dia():
     if ULTIMO_DIA_FRASE != hoje: FRASE_DO_DIA_ATUAL = random.choice(FRASES_MOTIVACIONAIS); ULTIMO_DIA_FRASE = hoje
     return FRASE_DO_DIA_ATUAL
 
-def calcular_metricas_dashboard(df_full):
-    hoje = datetime.now()
-    inicio_mes_atual = hoje.replace(day=1, hour=0, minute=0, second=0)
-    df_concluidos_mes_atual = df_full[(df_full[COLUNA_STATUS] == STATUS_CONCLUIDO) & (pd.to_datetime(df_full[COLUNA_DATA_STATUS]) >= inicio_mes_atual) & (pd.to_datetime(df_full[COLUNA_DATA_STATUS]) <= hoje)]
-    total_mes_atual_pedidos = len(df_concluidos_mes_atual)
-    total_mes_atual_qtd = df_concluidos_mes_atual[COLUNA_QTD].sum()
-    dias_uteis_mes_atual = np.busday_count(inicio_mes_atual.strftime('%Y-%m-%d'), (hoje + timedelta(days=1)).strftime('%Y-%m-%d'))
-    media_diaria_atual = total_mes_atual_pedidos / dias_uteis_mes_atual if dias_uteis_mes_atual > 0 else 0
-    media_diaria_qtd = total_mes_atual_qtd / dias_uteis_mes_atual if dias_uteis_mes_atual > 0 else 0
-    
-    fim_mes_anterior = inicio_mes_atual - timedelta(days=1); inicio_mes_anterior = fim_mes_anterior.replace(day=1)
-    df_concluidos_mes_anterior = df_full[(df_full[COLUNA_STATUS] == STATUS_CONCLUIDO) & (pd.to_datetime(df_full[COLUNA_DATA_STATUS]) >= inicio_mes_anterior) & (pd.to_datetime(df_full[COLUNA_DATA_STATUS]) <= fim_mes_anterior)]
-    total_mes_anterior = len(df_concluidos_mes_anterior)
-    dias_uteis_mes_anterior = np.busday_count(inicio_mes_anterior.strftime('%Y-%m-%d'), (fim_mes_anterior + timedelta(days=1)).strftime('%Y-%m-%d'))
-    media_diaria_anterior = len(df_concluidos_mes_anterior) / dias_uteis_mes_anterior if dias_uteis_mes_anterior > 0 else 0
-    
-    recorde_dia_valor = 0; recorde_dia_data = ""; recorde_dia_qtd = 0
-    if not df_concluidos_mes_atual.empty:
-        producao_diaria = df_concluidos_mes_atual.groupby(pd.to_datetime(df_concluidos_mes_atual[COLUNA_DATA_STATUS]).dt.date).size()
-        if not producao_diaria.empty:
-            recorde_dia_valor = producao_diaria.max()
-            recorde_dia_data_obj = producao_diaria.idxmax()
-            recorde_dia_data = recorde_dia_data_obj.strftime('%d/%m/%Y')
-            recorde_dia_qtd = df_concluidos_mes_atual[pd.to_datetime(df_concluidos_mes_atual[COLUNA_DATA_STATUS]).dt.date == recorde_dia_data_obj][COLUNA_QTD].sum()
-
-    return {"total_mes_atual": total_mes_atual_pedidos, "total_mes_atual_qtd": total_mes_atual_qtd, "media_diaria_atual": media_diaria_atual, "media_diaria_qtd": media_diaria_qtd,
-            "total_mes_anterior": total_mes_anterior, "media_diaria_anterior": media_diaria_anterior,
-            "recorde_dia_valor": recorde_dia_valor, "recorde_dia_data": recorde_dia_data, "recorde_dia_qtd": recorde_dia_qtd}
-
-def calcular_dados_grafico(df_full):
-    df_concluidos = df_full.dropna(subset=[COLUNA_DATA_STATUS]).copy()
-    df_concluidos = df_concluidos[df_concluidos[COLUNA_STATUS] == STATUS_CONCLUIDO].copy()
-    if df_concluidos.empty: return []
-    df_concluidos['Semana'] = pd.to_datetime(df_concluidos[COLUNA_DATA_STATUS]).dt.to_period('W-SUN').dt.start_time
-    semanal = df_concluidos.groupby('Semana')[COLUNA_QTD].sum()
-    semanas_recentes = pd.date_range(end=datetime.now(), periods=4, freq='W-MON').normalize()
-    semanal = semanal.reindex(semanas_recentes, fill_value=0)
-    return list(semanal.items())
+def calcular_metricas_dashboard(resumo):
+    media = lambda total, dias: total / dias if dias > 0 else 0
+    return {"total_mes_atual": resumo.total_mes_atual, "total_mes_atual_qtd": resumo.total_mes_atual_qtd,
+            "media_diaria_atual": media(resumo.total_mes_atual, resumo.dias_uteis_mes_atual), "media_diaria_qtd": media(resumo.total_mes_atual_qtd, resumo.dias_uteis_mes_atual),
+            "total_mes_anterior": resumo.total_mes_anterior, "media_diaria_anterior": media(resumo.total_mes_anterior, resumo.dias_uteis_mes_anterior),
+            "recorde_dia_valor": resumo.recorde_dia_valor, "recorde_dia_data": resumo.recorde_dia_data, "recorde_dia_qtd": resumo.recorde_dia_qtd}
+
+def calcular_dados_grafico(resumo):
+    return list(resumo.semanal)
 
 STYLESHEET = """
     QMainWindow { background-color: #1C1C1C; } QLabel { color: #E0E0E0; }
     #Header { background-color: #2E2E2E; border-bottom: 2px solid #FF6600; }
-    #LogoLabel { padding: 5px; } .SectionTitle { border-bottom: 2px solid; padding-bottom: 8px; margin-bottom: 10px; }
+    #LogoLabel { padding: 5px; } #PainelTitulo { color: #FF6600; } #AvisoDesatualizado { color: #F1C40F; padding-right: 20px; } .SectionTitle { border-bottom: 2px solid; padding-bottom: 8px; margin-bottom: 10px; }
     #PrioridadesTitle, #PendentesTitle, #AguardandoMontagemTitle, #AguardandoChegadaTitle { color: #FF6600; border-bottom-color: #FF6600; }
     #ConcluidosTitle { color: #2ECC71; border-bottom-color: #2ECC71; } #CanceladosTitle { color: #E74C3C; border-bottom-color: #E74C3C; }
     #CounterLabel { color: #888888; font-style: italic; padding-top: 10px; }
@@ -139,37 +750,137 @@ STYLESHEET = """
     QProgressBar { border: 1px solid #555; border-radius: 5px; text-align: center; background-color: #2E2E2E; }
     QProgressBar::chunk { background-color: #FF6600; border-radius: 4px; }
     QProgressBar#currentWeek::chunk { background-color: #FFAA33; }
+    #ListaPedidos { background: transparent; border: none; }
+    #ListaPedidos QScrollBar:vertical { background: #252525; width: 6px; } #ListaPedidos QScrollBar::handle:vertical { background: #555; border-radius: 3px; }
+    #ListaPedidos QScrollBar::add-line, #ListaPedidos QScrollBar::sub-line { height: 0px; }
+    #OverlayMetricas { background-color: rgba(0, 0, 0, 210); color: #7CFC00; border: 1px solid #444; padding: 8px; }
 """
 
+# --- LISTAS DE PEDIDOS (model/view: só as linhas visíveis são desenhadas) ---
+def distribuir_pedidos(principal):
+    """Onde cada pedido em aberto aparece: os primeiros "Aguardando Montagem"/"Em Montagem" nos cards e o resto, na
+    mesma ordem de prioridade, na lista "Aguardando Montagem". Cada pedido com um dos quatro status em aberto entra em exatamente um lugar."""
+    prioridades = [l for l in principal if l.status in (STATUS_AGUARDANDO, STATUS_EM_MONTAGEM)]
+    return {"cards": prioridades[:CARDS_PRIORIDADE], "aguardando_montagem": prioridades[CARDS_PRIORIDADE:],
+            "pendentes": [l for l in principal if l.status == STATUS_PENDENTE],
+            "aguardando_chegada": [l for l in principal if l.status == STATUS_AGUARDANDO_CHEGADA]}
+
+class ModeloPedidos(QAbstractListModel):
+    """Lista de LinhaPedido. `definir_linhas` compara com a lista anterior pelo número do pedido e avisa a vista só
+    das linhas inseridas, removidas ou alteradas; a rolagem e o que não mudou ficam intactos."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.linhas = ()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.linhas)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid(): return None
+        linha = self.linhas[index.row()]
+        if role == Qt.UserRole: return linha
+        if role == Qt.DisplayRole: return f"P{linha.prioridade}: {linha.pedido} ({linha.pv}) \"{linha.qtd}\""
+        return None
+
+    def definir_linhas(self, linhas):
+        linhas = tuple(linhas); antigas = self.linhas
+        if linhas == antigas: return
+        operacoes = difflib.SequenceMatcher(None, [l.pedido for l in antigas], [l.pedido for l in linhas], autojunk=False).get_opcodes()
+        deslocamento = 0
+        for operacao, i1, i2, j1, j2 in operacoes:
+            inicio = i1 + deslocamento
+            if operacao in ("delete", "replace"):
+                self.beginRemoveRows(QModelIndex(), inicio, inicio + i2 - i1 - 1)
+                self.linhas = self.linhas[:inicio] + self.linhas[inicio + i2 - i1:]; self.endRemoveRows()
+            if operacao in ("insert", "replace"):
+                self.beginInsertRows(QModelIndex(), inicio, inicio + j2 - j1 - 1)
+                self.linhas = self.linhas[:inicio] + linhas[j1:j2] + self.linhas[inicio:]; self.endInsertRows()
+            if operacao == "equal":
+                # Mesmo pedido na mesma ordem, mas PV, quantidade ou prioridade podem ter mudado.
+                alteradas = [k for k in range(i2 - i1) if antigas[i1 + k] != linhas[j1 + k]]
+                if alteradas:
+                    self.linhas = self.linhas[:inicio] + linhas[j1:j2] + self.linhas[inicio + i2 - i1:]
+                    self.dataChanged.emit(self.index(inicio + alteradas[0]), self.index(inicio + alteradas[-1]))
+            deslocamento += (j2 - j1) - (i2 - i1)
+        self.linhas = linhas
+
+class DelegatePedido(QStyledItemDelegate):
+    """Desenha "P3: CV-... (PV) "qtd"" direto com o QPainter, sem um QLabel com HTML por linha."""
+    COR_TEXTO, COR_QTD, COR_EM_MONTAGEM = QColor("#E0E0E0"), QColor("#2ECC71"), QColor("#F39C12")
+
+    def __init__(self, fonte, com_prioridade, parent=None):
+        super().__init__(parent)
+        self.fonte = QFont(fonte); self.fonte_negrito = QFont(fonte); self.fonte_negrito.setBold(True); self.com_prioridade = com_prioridade
+        self.metricas = QFontMetrics(self.fonte); self.metricas_negrito = QFontMetrics(self.fonte_negrito)
+        self.altura = max(self.metricas.height(), self.metricas_negrito.height()) + 8
+
+    def paint(self, painter, option, index):
+        linha = index.data(Qt.UserRole)
+        pedido = f"P{linha.prioridade}: {linha.pedido}" if self.com_prioridade else str(linha.pedido)
+        # Pedidos "Em Montagem" que não couberam nos cards ficam na lista "Aguardando Montagem", na cor do card.
+        cor_pedido = self.COR_EM_MONTAGEM if linha.status == STATUS_EM_MONTAGEM else self.COR_TEXTO
+        segmentos = ((pedido, self.fonte_negrito, self.metricas_negrito, cor_pedido), (f" ({linha.pv}) ", self.fonte, self.metricas, self.COR_TEXTO),
+                     (f"\"{linha.qtd}\"", self.fonte, self.metricas, self.COR_QTD))
+        painter.save(); retangulo = option.rect.adjusted(4, 0, -4, 0); x = retangulo.left()
+        for texto, fonte, metricas, cor in segmentos:
+            largura = retangulo.right() - x
+            if largura <= 0: break
+            texto = metricas.elidedText(texto, Qt.ElideRight, largura)
+            painter.setFont(fonte); painter.setPen(cor)
+            painter.drawText(QRect(x, retangulo.top(), largura, retangulo.height()), Qt.AlignLeft | Qt.AlignVCenter, texto)
+            x += metricas.horizontalAdvance(texto)
+        painter.restore()
+
+    def sizeHint(self, option, index):
+        return QSize(0, self.altura)
+
+class ListaPedidos(QListView):
+    """Lista rolável para a TV: com ROLAGEM_AUTOMATICA_MS > 0 avança uma página por vez e volta ao topo no fim."""
+    def __init__(self, fonte, com_prioridade, parent=None):
+        super().__init__(parent)
+        self.setObjectName("ListaPedidos"); self.setModel(ModeloPedidos(self)); self.setItemDelegate(DelegatePedido(fonte, com_prioridade, self))
+        self.setUniformItemSizes(True); self.setSelectionMode(QAbstractItemView.NoSelection); self.setFocusPolicy(Qt.NoFocus)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerItem); self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.timer_rolagem = QTimer(self); self.timer_rolagem.timeout.connect(self.rolar_pagina)
+        if ROLAGEM_AUTOMATICA_MS > 0: self.timer_rolagem.start(ROLAGEM_AUTOMATICA_MS)
+
+    def rolar_pagina(self):
+        barra = self.verticalScrollBar()
+        if barra.maximum() > 0: barra.setValue(0 if barra.value() >= barra.maximum() else barra.value() + barra.pageStep())
+
 class PainelMtec(QMainWindow):
-    def __init__(self):
+    def __init__(self, titulo="", filtro=SEM_FILTRO):
         super().__init__()
-        self.setWindowTitle("Painel de Produção MTEC"); self.setGeometry(100, 100, 1920, 1080); self.setStyleSheet(STYLESHEET)
+        self.titulo = titulo; self.filtro = filtro
+        self.setWindowTitle(f"Painel de Produção MTEC - {titulo}" if titulo else "Painel de Produção MTEC"); self.setGeometry(100, 100, 1920, 1080); self.setStyleSheet(STYLESHEET)
         self.main_container = QWidget(); self.error_container = QWidget(); self.is_showing_error = False
         self.setup_ui()
-        self.timer = QTimer(self); self.timer.timeout.connect(self.atualizar_dados_e_ui)
-        self.atualizar_dados_e_ui(); self.timer.start(INTERVALO_CHECK_MS)
 
     def setup_ui(self):
         self.central_widget = QWidget(); self.setCentralWidget(self.central_widget); layout = QVBoxLayout(self.central_widget); layout.setContentsMargins(0,0,0,0); layout.setSpacing(0)
         main_layout = QVBoxLayout(self.main_container); main_layout.setContentsMargins(0, 0, 0, 0); main_layout.setSpacing(0)
         header = QWidget(); header.setObjectName("Header"); header.setFixedHeight(60); header_layout = QHBoxLayout(header); header_layout.setContentsMargins(20, 0, 20, 0)
-        logo_label = QLabel("mtec."); logo_label.setObjectName("LogoLabel"); logo_label.setFont(QFont("Inter", 22, QFont.Bold)); header_layout.addWidget(logo_label); header_layout.addStretch(); main_layout.addWidget(header)
+        logo_label = QLabel("mtec."); logo_label.setObjectName("LogoLabel"); logo_label.setFont(QFont("Inter", 22, QFont.Bold)); header_layout.addWidget(logo_label); header_layout.addStretch()
+        self.aviso_desatualizado = QLabel(); self.aviso_desatualizado.setObjectName("AvisoDesatualizado"); self.aviso_desatualizado.setFont(QFont("Inter", 12, QFont.Bold)); self.aviso_desatualizado.hide(); header_layout.addWidget(self.aviso_desatualizado)
+        if self.titulo: titulo_label = QLabel(self.titulo); titulo_label.setObjectName("PainelTitulo"); titulo_label.setFont(QFont("Inter", 18, QFont.Bold)); header_layout.addWidget(titulo_label)
+        main_layout.addWidget(header)
         self.body_widget = QWidget(); self.body_layout = QHBoxLayout(self.body_widget); self.body_layout.setContentsMargins(15, 15, 15, 15); self.body_layout.setSpacing(20); main_layout.addWidget(self.body_widget, 1)
         dashboard_frame = QFrame(); dashboard_frame.setObjectName("DashboardFrame"); dashboard_frame.setFixedHeight(280); self.dashboard_layout = QHBoxLayout(dashboard_frame); main_layout.addWidget(dashboard_frame)
         self.setup_ui_columns()
         error_page_layout = QVBoxLayout(self.error_container); self.error_label = QLabel(); self.error_label.setObjectName("ErrorLabel"); self.error_label.setAlignment(Qt.AlignCenter); self.error_label.setWordWrap(True); self.error_label.setFont(QFont("Inter", 18, QFont.Bold)); error_page_layout.addWidget(self.error_label)
         layout.addWidget(self.main_container); layout.addWidget(self.error_container); self.error_container.hide()
+        # Fora dos layouts: flutua por cima do painel quando ligado (F12).
+        self.overlay_metricas = QLabel(self); self.overlay_metricas.setObjectName("OverlayMetricas"); self.overlay_metricas.setFont(QFont("Consolas", 10)); self.overlay_metricas.hide()
         
     def setup_ui_columns(self):
+        # Os widgets são criados uma única vez; a cada atualização só mudamos texto/visibilidade do que mudou.
         self.limpar_layout(self.body_layout); self.limpar_layout(self.dashboard_layout)
+        self.font_titulo = QFont("Inter", 16, QFont.Bold); self.font_item = QFont("Inter", 11); self.font_contador = QFont("Inter", 10); self.font_total = QFont("Inter", 9)
         self.prioridades_layout = QVBoxLayout(); self.pendentes_layout = QVBoxLayout(); self.aguardando_montagem_layout = QVBoxLayout(); self.aguardando_chegada_layout = QVBoxLayout()
         side_column_frame = QFrame(); side_column_frame.setObjectName("SideColumnFrame"); side_column_frame.setFixedWidth(300)
         self.side_layout = QVBoxLayout(side_column_frame); self.concluidos_layout = QVBoxLayout(); self.cancelados_layout = QVBoxLayout()
         
-        self.side_layout.addLayout(self.concluidos_layout)
-        
-        self.side_layout.addStretch(1)
+        self.side_layout.addLayout(self.concluidos_layout, 1)
 
         linha_separadora = QFrame()
         linha_separadora.setFrameShape(QFrame.HLine)
@@ -178,98 +889,140 @@ class PainelMtec(QMainWindow):
         self.side_layout.addWidget(linha_separadora)
         self.side_layout.addSpacing(20)
 
-        self.side_layout.addLayout(self.cancelados_layout)
-
-        self.side_layout.addStretch(2)
+        self.side_layout.addLayout(self.cancelados_layout, 1)
         
         self.body_layout.addLayout(self.prioridades_layout, 2); self.body_layout.addLayout(self.aguardando_montagem_layout, 1); self.body_layout.addLayout(self.aguardando_chegada_layout, 1); self.body_layout.addLayout(self.pendentes_layout, 1); self.body_layout.addWidget(side_column_frame)
         self.metricas_layout = QVBoxLayout(); self.grafico_layout = QVBoxLayout(); self.kpi_layout = QVBoxLayout()
         self.dashboard_layout.addLayout(self.metricas_layout, 1); self.dashboard_layout.addLayout(self.grafico_layout, 2); self.dashboard_layout.addStretch(1); self.dashboard_layout.addLayout(self.kpi_layout, 1)
+
+        self.cards_prioridade = self.montar_cards_prioridade(self.prioridades_layout)
+        self.lista_pendentes = self.montar_lista(self.pendentes_layout, "PENDENTES", "Nenhum pedido para exibir.")
+        self.lista_aguardando_montagem = self.montar_lista(self.aguardando_montagem_layout, "AGUARDANDO MONTAGEM", "Nenhum pedido para exibir.")
+        self.lista_aguardando_chegada = self.montar_lista(self.aguardando_chegada_layout, "AGUARDANDO CHEGADA", "Nenhum pedido para exibir.")
+        self.lista_concluidos = self.montar_lista(self.concluidos_layout, "CONCLUÍDOS DO DIA", "Nenhum.", com_total=True)
+        self.lista_cancelados = self.montar_lista(self.cancelados_layout, "CANCELADOS DO DIA", "Nenhum.", com_total=True)
+        self.montar_dashboard()
     
-    def atualizar_dados_e_ui(self):
+    def aplicar_snapshot(self, snapshot, desatualizado_desde=None):
+        # desatualizado_desde: o snapshot veio do disco (partida), não de uma leitura da planilha.
+        if desatualizado_desde is not None: self.definir_texto(self.aviso_desatualizado, f"DADOS DE {desatualizado_desde:%d/%m %H:%M} · ATUALIZANDO...")
+        self.definir_visivel(self.aviso_desatualizado, desatualizado_desde is not None)
+        if not snapshot.alterado and not self.is_showing_error: return
         try:
-            df_full, df_principal, df_concluidos, df_cancelados, totais_concluidos, totais_cancelados = carregar_dados()
             if self.is_showing_error: self.clear_error_message()
-            self.desenhar_colunas(df_principal, df_concluidos, df_cancelados, totais_concluidos, totais_cancelados)
-            metricas = calcular_metricas_dashboard(df_full)
-            dados_grafico = calcular_dados_grafico(df_full)
-            frase = obter_frase_do_dia()
-            self.desenhar_dashboard(metricas, dados_grafico, frase)
+            self.desenhar_colunas(snapshot.principal, snapshot.concluidos_hoje, snapshot.cancelados_hoje, snapshot.totais_concluidos, snapshot.totais_cancelados)
+            self.desenhar_dashboard(snapshot.metricas, snapshot.dados_grafico, obter_frase_do_dia())
         except Exception as e:
             self.mostrar_erro(str(e))
-    
-    def desenhar_colunas(self, df_principal, df_concluidos, df_cancelados, totais_concluidos, totais_cancelados):
-        font_titulo = QFont("Inter", 16, QFont.Bold); font_item = QFont("Inter", 11); font_contador = QFont("Inter", 10); font_total = QFont("Inter", 9)
-        df_prioridades = df_principal[df_principal[COLUNA_STATUS].isin([STATUS_AGUARDANDO, STATUS_EM_MONTAGEM])]
-        pedidos_em_prioridade_ids = df_prioridades.head(4)[COLUNA_PEDIDO_ID].tolist()
-        
-        self.desenhar_cards_prioridade(self.prioridades_layout, df_prioridades, font_titulo)
-        df_pendentes = df_principal[df_principal[COLUNA_STATUS] == STATUS_PENDENTE]
-        self.desenhar_lista_vertical(self.pendentes_layout, df_pendentes, "PENDENTES", font_titulo, font_item, font_contador)
-        
-        df_aguardando_base = df_principal[df_principal[COLUNA_STATUS] == STATUS_AGUARDANDO]
-        df_aguardando_filtrado = df_aguardando_base[~df_aguardando_base[COLUNA_PEDIDO_ID].isin(pedidos_em_prioridade_ids)]
-        self.desenhar_lista_vertical(self.aguardando_montagem_layout, df_aguardando_filtrado, "AGUARDANDO MONTAGEM", font_titulo, font_item, font_contador)
 
-        df_aguardando_chegada = df_principal[df_principal[COLUNA_STATUS] == STATUS_AGUARDANDO_CHEGADA]
-        self.desenhar_lista_vertical(self.aguardando_chegada_layout, df_aguardando_chegada, "AGUARDANDO CHEGADA", font_titulo, font_item, font_contador)
+    def desenhar_colunas(self, principal, concluidos, cancelados, totais_concluidos, totais_cancelados):
+        pedidos = distribuir_pedidos(principal)
+        self.desenhar_cards_prioridade(pedidos["cards"])
+        self.desenhar_lista_vertical(self.lista_pendentes, pedidos["pendentes"])
+
+        aguardando_montagem = pedidos["aguardando_montagem"]; em_montagem = sum(l.status == STATUS_EM_MONTAGEM for l in aguardando_montagem)
+        self.preencher_lista(self.lista_aguardando_montagem, aguardando_montagem,
+                             f"{len(aguardando_montagem)} pedidos" + (f" ({em_montagem} em montagem)" if em_montagem else "") if aguardando_montagem else "")
+
+        self.desenhar_lista_vertical(self.lista_aguardando_chegada, pedidos["aguardando_chegada"])
         
-        self.desenhar_lista_lateral(self.concluidos_layout, df_concluidos, "CONCLUÍDOS DO DIA", font_titulo, font_item, font_contador, font_total, totais_concluidos, limit=5)
-        self.desenhar_lista_lateral(self.cancelados_layout, df_cancelados, "CANCELADOS DO DIA", font_titulo, font_item, font_contador, font_total, totais_cancelados, limit=5)
+        self.desenhar_lista_lateral(self.lista_concluidos, concluidos, totais_concluidos)
+        self.desenhar_lista_lateral(self.lista_cancelados, cancelados, totais_cancelados)
 
-    def desenhar_lista_lateral(self, layout, df, titulo_texto, font_titulo, font_item, font_contador, font_total, totais, limit=None):
-        self.limpar_layout(layout); object_name = f"{titulo_texto.replace(' ', '')}Title"; layout.addWidget(self.criar_titulo(titulo_texto, object_name, font_titulo))
-        if df.empty: layout.addWidget(QLabel("Nenhum."))
-        else:
-            df_display = df.head(limit) if limit is not None else df
-            for _, row in df_display.iterrows():
-                texto = f"<b>{row[COLUNA_PEDIDO_ID]}</b> ({row[COLUNA_PV]}) <font color='#2ECC71'>\"{row[COLUNA_QTD]}\"</font>"
-                label = QLabel(texto); label.setFont(font_item); layout.addWidget(label)
-            if limit is not None and len(df) > limit:
-                restantes = len(df) - limit; contador_label = QLabel(f"+{restantes}..."); contador_label.setObjectName("CounterLabel"); contador_label.setFont(font_contador); layout.addWidget(contador_label)
+    # --- WIDGETS PERSISTENTES (só atualizamos o que mudou) ---
+    @staticmethod
+    def definir_texto(label, texto):
+        if label.text() != texto: label.setText(texto)
+
+    @staticmethod
+    def definir_visivel(widget, visivel):
+        if widget.isHidden() == visivel: widget.setVisible(visivel)
+
+    @staticmethod
+    def definir_object_name(widget, nome):
+        # Trocar o objectName muda o seletor do stylesheet; precisa repolir o widget.
+        if widget.objectName() != nome:
+            widget.setObjectName(nome); widget.style().unpolish(widget); widget.style().polish(widget)
+
+    def montar_lista(self, layout, titulo_texto, texto_vazio, com_total=False):
+        # A lista inteira fica no modelo; a vista rola (sozinha, na TV) e só desenha as linhas visíveis.
+        self.limpar_layout(layout); object_name = f"{titulo_texto.replace(' ', '')}Title"; layout.addWidget(self.criar_titulo(titulo_texto, object_name, self.font_titulo))
+        lista = {"vista": ListaPedidos(self.font_item, com_prioridade=not com_total), "total": None}
+        lista["modelo"] = lista["vista"].model()
+        lista["vazio"] = QLabel(texto_vazio); layout.addWidget(lista["vazio"]); layout.addWidget(lista["vista"], 1)
+        lista["contador"] = QLabel(); lista["contador"].setObjectName("CounterLabel"); lista["contador"].setFont(self.font_contador); lista["contador"].hide(); layout.addWidget(lista["contador"])
+        if com_total:
+            lista["total"] = QLabel(); lista["total"].setObjectName("TotalLabel"); lista["total"].setFont(self.font_total); layout.addWidget(lista["total"])
+        layout.addStretch()  # só ocupa espaço quando a lista está vazia (escondida)
+        return lista
+
+    def preencher_lista(self, lista, linhas, texto_contador):
+        lista["modelo"].definir_linhas(linhas)
+        self.definir_visivel(lista["vazio"], not linhas); self.definir_visivel(lista["vista"], bool(linhas))
+        if texto_contador: self.definir_texto(lista["contador"], texto_contador)
+        self.definir_visivel(lista["contador"], bool(texto_contador))
+
+    def desenhar_lista_lateral(self, lista, linhas, totais):
+        self.preencher_lista(lista, linhas, "")
         
         teravix, pv, total, teravix_qtd, pv_qtd, total_qtd = totais
         
         texto_total = f"<font color='#FF6600'>TERAVIX:</font> {teravix} ({teravix_qtd}) | <font color='#FF6600'>PV:</font> {pv} ({pv_qtd})<br><b><font color='#3498DB'>TOTAL DIA:</font></b> <b>{total} ({total_qtd})</b>"
-        
-        total_label = QLabel(texto_total); total_label.setObjectName("TotalLabel"); total_label.setFont(font_total); layout.addWidget(total_label)
-        layout.addStretch(1)
+        self.definir_texto(lista["total"], texto_total)
 
-    def desenhar_dashboard(self, metricas, dados_grafico, frase_do_dia):
-        self.limpar_layout(self.metricas_layout); self.limpar_layout(self.grafico_layout); self.limpar_layout(self.kpi_layout)
+    def desenhar_lista_vertical(self, lista, linhas):
+        self.preencher_lista(lista, linhas, f"{len(linhas)} pedidos" if linhas else "")
+
+    def montar_dashboard(self):
         titulo_metrica_font = QFont("Inter", 14, QFont.Bold); valor_metrica_font = QFont("Inter", 38, QFont.Bold)
         total_mes_titulo = QLabel("Total Concluído no Mês"); total_mes_titulo.setObjectName("MetricaTitle"); total_mes_titulo.setFont(titulo_metrica_font)
-        total_mes_valor = QLabel(f"{metricas['total_mes_atual']:.0f} <font color='#999' style='font-size:18px;'>({metricas['total_mes_atual_qtd']:.0f} máquinas)</font>"); total_mes_valor.setObjectName("MetricaValue"); total_mes_valor.setFont(valor_metrica_font)
+        self.total_mes_valor = QLabel(); self.total_mes_valor.setObjectName("MetricaValue"); self.total_mes_valor.setFont(valor_metrica_font)
         media_diaria_titulo = QLabel("Média Diária no Mês"); media_diaria_titulo.setObjectName("MetricaTitle"); media_diaria_titulo.setFont(titulo_metrica_font)
-        media_diaria_valor = QLabel(f"{metricas['media_diaria_atual']:.1f} <font color='#999' style='font-size:18px;'>({metricas['media_diaria_qtd']:.1f} máquinas)</font>"); media_diaria_valor.setObjectName("MetricaValue"); media_diaria_valor.setFont(valor_metrica_font)
-        self.metricas_layout.addWidget(total_mes_titulo); self.metricas_layout.addWidget(total_mes_valor); self.metricas_layout.addStretch(1); self.metricas_layout.addWidget(media_diaria_titulo); self.metricas_layout.addWidget(media_diaria_valor); self.metricas_layout.addStretch(1)
+        self.media_diaria_valor = QLabel(); self.media_diaria_valor.setObjectName("MetricaValue"); self.media_diaria_valor.setFont(valor_metrica_font)
+        self.metricas_layout.addWidget(total_mes_titulo); self.metricas_layout.addWidget(self.total_mes_valor); self.metricas_layout.addStretch(1); self.metricas_layout.addWidget(media_diaria_titulo); self.metricas_layout.addWidget(self.media_diaria_valor); self.metricas_layout.addStretch(1)
         titulo_grafico = QLabel(f"Desempenho Semanal (Meta: {META_SEMANAL} máquinas)"); titulo_grafico.setFont(titulo_metrica_font); self.grafico_layout.addWidget(titulo_grafico)
-        start_of_current_week = datetime.now().date() - timedelta(days=datetime.now().weekday())
-        for data, valor in dados_grafico:
-            fim_semana = data + timedelta(days=6); texto_semana = f"Semana {data.strftime('%d/%m')} a {fim_semana.strftime('%d/%m')}"
-            is_current_week = data.date() == start_of_current_week
-            if is_current_week: texto_semana = f"<b>▶ {texto_semana}</b>"
-            label_semana = QLabel(f"{texto_semana}: <b>{int(valor)}</b>"); label_semana.setFont(QFont("Inter", 10))
-            progress_bar = QProgressBar(); progress_bar.setRange(0, META_SEMANAL); progress_bar.setValue(min(int(valor), META_SEMANAL)); progress_bar.setTextVisible(False); progress_bar.setFixedHeight(18); progress_bar.setMaximumWidth(550)
-            if is_current_week: progress_bar.setObjectName("currentWeek")
-            self.grafico_layout.addWidget(label_semana); self.grafico_layout.addWidget(progress_bar)
+        self.barras_semanais = []; font_semana = QFont("Inter", 10)
+        for _ in range(4):
+            label_semana = QLabel(); label_semana.setFont(font_semana); label_semana.hide()
+            progress_bar = QProgressBar(); progress_bar.setRange(0, META_SEMANAL); progress_bar.setTextVisible(False); progress_bar.setFixedHeight(18); progress_bar.setMaximumWidth(550); progress_bar.hide()
+            self.grafico_layout.addWidget(label_semana); self.grafico_layout.addWidget(progress_bar); self.barras_semanais.append((label_semana, progress_bar))
         self.grafico_layout.addStretch()
         kpi_titulo_font = QFont("Inter", 12, QFont.Bold); kpi_valor_font = QFont("Inter", 14, QFont.Bold)
         frase_titulo = QLabel("Frase do Dia"); frase_titulo.setObjectName("KpiTitle"); frase_titulo.setFont(kpi_titulo_font)
-        frase_texto = QLabel(f'"{frase_do_dia}"'); frase_texto.setObjectName("FraseMotivacional"); frase_texto.setWordWrap(True); frase_texto.setFont(QFont("Inter", 11, italic=True))
-        self.kpi_layout.addWidget(frase_titulo); self.kpi_layout.addWidget(frase_texto); self.kpi_layout.addStretch(1)
+        self.frase_texto = QLabel(); self.frase_texto.setObjectName("FraseMotivacional"); self.frase_texto.setWordWrap(True); self.frase_texto.setFont(QFont("Inter", 11, italic=True))
+        self.kpi_layout.addWidget(frase_titulo); self.kpi_layout.addWidget(self.frase_texto); self.kpi_layout.addStretch(1)
 
         # --- ALTERAÇÃO AQUI: Bloco "Comparativo" redesenhado e posicionado antes do "Recorde" ---
         comp_titulo = QLabel("Comparativo Mensal (Mês Anterior)"); comp_titulo.setObjectName("KpiTitle"); comp_titulo.setFont(kpi_titulo_font)
-        comp_texto_str = (f"📈 <b>Produção Mês:</b> <font size='+2' color='#FF6600'>{metricas['total_mes_atual']:.0f}</font> (vs. {metricas['total_mes_anterior']:.0f})<br>"
-                          f"📊 <b>Média Diária:</b> <font size='+2' color='#FF6600'>{metricas['media_diaria_atual']:.1f}</font> (vs. {metricas['media_diaria_anterior']:.1f})")
-        comp_texto = QLabel(comp_texto_str); comp_texto.setFont(QFont("Inter", 11))
-        self.kpi_layout.addWidget(comp_titulo); self.kpi_layout.addWidget(comp_texto); self.kpi_layout.addStretch(2)
+        self.comp_texto = QLabel(); self.comp_texto.setFont(QFont("Inter", 11))
+        self.kpi_layout.addWidget(comp_titulo); self.kpi_layout.addWidget(self.comp_texto); self.kpi_layout.addStretch(2)
         
         # --- ALTERAÇÃO AQUI: Bloco "Recorde" posicionado depois ---
         recorde_titulo = QLabel("Recorde de Produção do Mês"); recorde_titulo.setObjectName("KpiTitle"); recorde_titulo.setFont(kpi_titulo_font)
-        recorde_texto = QLabel(f"🏆 <font color='#3498DB'>{metricas['recorde_dia_valor']} pedidos ({metricas['recorde_dia_qtd']} máq.)</font> em {metricas['recorde_dia_data']}"); recorde_texto.setFont(kpi_valor_font)
-        self.kpi_layout.addWidget(recorde_titulo); self.kpi_layout.addWidget(recorde_texto); self.kpi_layout.addStretch(1)
+        self.recorde_texto = QLabel(); self.recorde_texto.setFont(kpi_valor_font)
+        self.kpi_layout.addWidget(recorde_titulo); self.kpi_layout.addWidget(self.recorde_texto); self.kpi_layout.addStretch(1)
+
+    def desenhar_dashboard(self, metricas, dados_grafico, frase_do_dia):
+        self.definir_texto(self.total_mes_valor, f"{metricas['total_mes_atual']:.0f} <font color='#999' style='font-size:18px;'>({metricas['total_mes_atual_qtd']:.0f} máquinas)</font>")
+        self.definir_texto(self.media_diaria_valor, f"{metricas['media_diaria_atual']:.1f} <font color='#999' style='font-size:18px;'>({metricas['media_diaria_qtd']:.1f} máquinas)</font>")
+        start_of_current_week = datetime.now().date() - timedelta(days=datetime.now().weekday())
+        for i, (label_semana, progress_bar) in enumerate(self.barras_semanais):
+            visivel = i < len(dados_grafico)
+            self.definir_visivel(label_semana, visivel); self.definir_visivel(progress_bar, visivel)
+            if not visivel: continue
+            data, valor = dados_grafico[i]
+            fim_semana = data + timedelta(days=6); texto_semana = f"Semana {data.strftime('%d/%m')} a {fim_semana.strftime('%d/%m')}"
+            is_current_week = data.date() == start_of_current_week
+            if is_current_week: texto_semana = f"<b>▶ {texto_semana}</b>"
+            self.definir_texto(label_semana, f"{texto_semana}: <b>{int(valor)}</b>")
+            valor_barra = min(int(valor), META_SEMANAL)
+            if progress_bar.value() != valor_barra: progress_bar.setValue(valor_barra)
+            self.definir_object_name(progress_bar, "currentWeek" if is_current_week else "")
+        self.definir_texto(self.frase_texto, f'"{frase_do_dia}"')
+        comp_texto_str = (f"📈 <b>Produção Mês:</b> <font size='+2' color='#FF6600'>{metricas['total_mes_atual']:.0f}</font> (vs. {metricas['total_mes_anterior']:.0f})<br>"
+                          f"📊 <b>Média Diária:</b> <font size='+2' color='#FF6600'>{metricas['media_diaria_atual']:.1f}</font> (vs. {metricas['media_diaria_anterior']:.1f})")
+        self.definir_texto(self.comp_texto, comp_texto_str)
+        self.definir_texto(self.recorde_texto, f"🏆 <font color='#3498DB'>{metricas['recorde_dia_valor']} pedidos ({metricas['recorde_dia_qtd']} máq.)</font> em {metricas['recorde_dia_data']}")
     
     def limpar_layout(self, layout):
         if layout is None: return
@@ -284,36 +1037,38 @@ class PainelMtec(QMainWindow):
         titulo_label = QLabel(texto); titulo_label.setObjectName(object_name); titulo_label.setProperty("class", "SectionTitle"); titulo_label.setFont(font)
         return titulo_label
 
-    def desenhar_cards_prioridade(self, layout, df, font_titulo):
-        self.limpar_layout(layout); layout.addWidget(self.criar_titulo("PRIORIDADES", "PrioridadesTitle", font_titulo))
-        if df.empty: layout.addWidget(QLabel("Nenhuma prioridade para exibir."))
-        else:
-            for index, (_, row) in enumerate(df.head(4).iterrows()):
-                card = self.criar_card_widget(row, index + 1); layout.addWidget(card)
+    def montar_cards_prioridade(self, layout):
+        self.limpar_layout(layout); layout.addWidget(self.criar_titulo("PRIORIDADES", "PrioridadesTitle", self.font_titulo))
+        self.prioridades_vazio = QLabel("Nenhuma prioridade para exibir."); layout.addWidget(self.prioridades_vazio)
+        cards = []
+        for _ in range(CARDS_PRIORIDADE):
+            card = self.criar_card_widget(); card.hide(); layout.addWidget(card); cards.append(card)
         layout.addStretch()
+        return cards
+
+    def desenhar_cards_prioridade(self, linhas):
+        self.definir_visivel(self.prioridades_vazio, not linhas)
+        for index, card in enumerate(self.cards_prioridade):
+            if index < len(linhas): self.atualizar_card_widget(card, linhas[index], index + 1)
+            self.definir_visivel(card, index < len(linhas))
 
-    def criar_card_widget(self, data, pos_lista):
+    def criar_card_widget(self):
         card = QFrame(); card.setObjectName("Card"); layout = QVBoxLayout(card); layout.setSpacing(4)
-        titulo_texto = f"<b>{pos_lista}º (P{data['Prioridade']}): {data[COLUNA_PEDIDO_ID]}</b> ({data[COLUNA_PV]})"
-        titulo = QLabel(titulo_texto); titulo.setObjectName("CardTitle"); titulo.setFont(QFont("Inter", 12, QFont.Bold))
-        status = QLabel(str(data.get(COLUNA_STATUS, 'N/A')).upper()); status.setFont(QFont("Inter", 10, QFont.Bold))
-        if data[COLUNA_STATUS] == STATUS_AGUARDANDO: status.setObjectName("CardStatus_Aguardando")
-        elif data[COLUNA_STATUS] == STATUS_EM_MONTAGEM: status.setObjectName("CardStatus_EmMontagem")
-        servico = QLabel(str(data.get(COLUNA_SERVICO, 'N/A'))); servico.setWordWrap(True); servico.setFont(QFont("Inter", 10))
-        qtd = QLabel(f"<b>QTD. MÁQUINAS:</b> {data[COLUNA_QTD]}"); qtd.setFont(QFont("Inter", 10, QFont.Bold)); qtd.setStyleSheet("color: #2ECC71;")
-        layout.addWidget(titulo); layout.addWidget(status); layout.addSpacing(5); layout.addWidget(servico); layout.addStretch(); layout.addWidget(qtd)
+        card.titulo = QLabel(); card.titulo.setObjectName("CardTitle"); card.titulo.setFont(QFont("Inter", 12, QFont.Bold))
+        card.status = QLabel(); card.status.setFont(QFont("Inter", 10, QFont.Bold))
+        card.servico = QLabel(); card.servico.setWordWrap(True); card.servico.setFont(QFont("Inter", 10))
+        card.qtd = QLabel(); card.qtd.setFont(QFont("Inter", 10, QFont.Bold)); card.qtd.setStyleSheet("color: #2ECC71;")
+        layout.addWidget(card.titulo); layout.addWidget(card.status); layout.addSpacing(5); layout.addWidget(card.servico); layout.addStretch(); layout.addWidget(card.qtd)
         return card
 
-    def desenhar_lista_vertical(self, layout, df, titulo_texto, font_titulo, font_item, font_contador):
-        self.limpar_layout(layout); object_name = f"{titulo_texto.replace(' ', '')}Title"; layout.addWidget(self.criar_titulo(titulo_texto, object_name, font_titulo))
-        if df.empty: layout.addWidget(QLabel("Nenhum pedido para exibir."))
-        else:
-            for _, row in df.head(5).iterrows():
-                texto = f"<b>P{row['Prioridade']}: {row[COLUNA_PEDIDO_ID]}</b> ({row[COLUNA_PV]}) <font color='#2ECC71'>\"{row[COLUNA_QTD]}\"</font>"
-                label = QLabel(texto); label.setFont(font_item); layout.addWidget(label)
-            if len(df) > 5:
-                restantes = len(df) - 5; contador_label = QLabel(f"+{restantes} pedidos..."); contador_label.setObjectName("CounterLabel"); contador_label.setFont(font_contador); layout.addWidget(contador_label)
-        layout.addStretch()
+    def atualizar_card_widget(self, card, data, pos_lista):
+        self.definir_texto(card.titulo, f"<b>{pos_lista}º (P{data.prioridade}): {data.pedido}</b> ({data.pv})")
+        self.definir_texto(card.status, str(data.status).upper())
+        if data.status == STATUS_AGUARDANDO: self.definir_object_name(card.status, "CardStatus_Aguardando")
+        elif data.status == STATUS_EM_MONTAGEM: self.definir_object_name(card.status, "CardStatus_EmMontagem")
+        else: self.definir_object_name(card.status, "")
+        self.definir_texto(card.servico, str(data.servico))
+        self.definir_texto(card.qtd, f"<b>QTD. MÁQUINAS:</b> {data.qtd}")
 
     def mostrar_erro(self, mensagem):
         print(f"ERRO CRÍTICO: {mensagem}")
@@ -323,7 +1078,12 @@ class PainelMtec(QMainWindow):
             self.main_container.hide(); self.error_container.show()
     
     def clear_error_message(self):
-        self.is_showing_error = False; self.error_container.hide(); self.main_container.show(); self.setup_ui_columns()
+        self.is_showing_error = False; self.error_container.hide(); self.main_container.show()
+
+    def atualizar_overlay(self):
+        if self.overlay_metricas.isHidden(): return
+        self.definir_texto(self.overlay_metricas, METRICAS.texto_overlay()); self.overlay_metricas.adjustSize()
+        self.overlay_metricas.move(self.width() - self.overlay_metricas.width() - 20, 70); self.overlay_metricas.raise_()
 
     def keyPressEvent(self, event):
         """Este método especial é chamado sempre que uma tecla é pressionada."""
@@ -332,13 +1092,216 @@ class PainelMtec(QMainWindow):
                 self.showMaximized()
             else:
                 self.showFullScreen()
+        elif event.key() == Qt.Key_F12:
+            self.overlay_metricas.setVisible(self.overlay_metricas.isHidden()); self.atualizar_overlay()
         
         super().keyPressEvent(event)
 
+# --- COORDENAÇÃO DA CARGA (uma leitura para todos os painéis) ---
+class CoordenadorPaineis(QObject):
+    """Vigia as planilhas, dispara a carga em segundo plano e distribui o snapshot de cada filtro
+    para as janelas. N painéis custam uma leitura e uma agregação, não N."""
+    def __init__(self, fontes, paineis, parent=None):
+        super().__init__(parent)
+        self.fontes = tuple(fontes); self.paineis = list(paineis)
+        self.filtros = tuple(dict.fromkeys(painel.filtro for painel in self.paineis))
+        self.pool_carga = QThreadPool(self); self.pool_carga.setMaxThreadCount(1)
+        self.sinais_carga = SinaisCarga(self); self.sinais_carga.finalizada.connect(self.carga_finalizada)
+        self.tarefa_atual = None; self.ultimo_id_carga = 0; self.carga_pendente = False; self.tentativas_restantes = 0; self.inicio_carga = 0.0
+        self.timer_salvamento = QTimer(self); self.timer_salvamento.setSingleShot(True); self.timer_salvamento.timeout.connect(self.atualizar_dados_e_ui)
+        self.ultima_assinatura_vista = None
+        self.observador = QFileSystemWatcher(self)
+        self.observador.directoryChanged.connect(self.pasta_alterada); self.observador.fileChanged.connect(self.pasta_alterada)
+        observando = self.vigiar_planilhas()
+        self.timer = QTimer(self); self.timer.timeout.connect(self.atualizar_dados_e_ui)
+        self.atualizar_dados_e_ui(); self.timer.start(INTERVALO_FALLBACK_MS if observando else INTERVALO_CHECK_MS)
+
+    def vigiar_planilhas(self):
+        # O Excel salva num temporário e renomeia por cima: o watcher perde o arquivo antigo, então
+        # vigiamos a pasta e recolocamos o arquivo sempre que ele reaparece.
+        pastas = list(dict.fromkeys(os.path.dirname(f.caminho) for f in self.fontes)); arquivos = list(dict.fromkeys(f.caminho for f in self.fontes))
+        vigiados = self.observador.files() + self.observador.directories()
+        caminhos = [c for c in pastas + arquivos if os.path.exists(c) and c not in vigiados]
+        if caminhos: self.observador.addPaths(caminhos)
+        return all(p in self.observador.directories() for p in pastas)
+
+    def pasta_alterada(self, _caminho):
+        self.vigiar_planilhas()
+        assinatura = assinatura_fontes(self.fontes)
+        # Criar o "~$arquivo" de trava ao abrir a planilha também mexe na pasta; só as planilhas interessam.
+        if assinatura == self.ultima_assinatura_vista: return
+        self.ultima_assinatura_vista = assinatura; self.tentativas_restantes = MAX_TENTATIVAS_LEITURA
+        self.timer_salvamento.start(ESPERA_SALVAMENTO_MS)
+
+    def atualizar_dados_e_ui(self):
+        # Ticks que chegam com uma carga em andamento são agrupados numa única recarga posterior.
+        # Se a planilha mudou desde o início da carga atual, ela já nasceu velha: cancela.
+        if self.tarefa_atual is not None:
+            self.carga_pendente = True; METRICAS.contar("agrupadas")
+            if assinatura_fontes(self.fontes) != self.tarefa_atual.assinatura_inicial: self.tarefa_atual.cancelar()
+            return
+        self.ultimo_id_carga += 1; self.inicio_carga = time.perf_counter()
+        self.tarefa_atual = TarefaCarga(self.ultimo_id_carga, self.sinais_carga, self.fontes, self.filtros)
+        self.pool_carga.start(self.tarefa_atual)
+
+    def carga_finalizada(self, id_carga, snapshots, erro):
+        if self.tarefa_atual is None or id_carga != self.tarefa_atual.id_carga: return
+        self.tarefa_atual = None; situacao = "erros" if erro else "canceladas"
+        if erro and self.tentativas_restantes > 0:
+            # Logo após um salvamento a planilha pode estar incompleta ou travada pelo Excel: tenta de novo.
+            self.tentativas_restantes -= 1; self.timer_salvamento.start(ESPERA_NOVA_TENTATIVA_MS)
+        elif erro:
+            for painel in self.paineis: painel.mostrar_erro(erro)
+        elif snapshots is not None:
+            self.tentativas_restantes = 0
+            alterado = any(snapshot.alterado for snapshot in snapshots.values()); situacao = "atualizacoes" if alterado else "sem_mudanca"
+            with METRICAS.etapa("desenho") if alterado else nullcontext():
+                for painel in self.paineis: painel.aplicar_snapshot(snapshots[painel.filtro])
+            if alterado: METRICAS.registrar_widgets(sum(len(painel.findChildren(QWidget)) for painel in self.paineis))
+        METRICAS.fechar_atualizacao(situacao, time.perf_counter() - self.inicio_carga, erro)
+        for painel in self.paineis: painel.atualizar_overlay()
+        if self.carga_pendente:
+            self.carga_pendente = False; self.atualizar_dados_e_ui()
+
+    def encerrar(self):
+        self.timer.stop(); self.timer_salvamento.stop()
+        if self.tarefa_atual is not None: self.tarefa_atual.cancelar()
+        self.pool_carga.waitForDone(2000)
+
+# --- MODO SERVIDOR (sem interface) ---
+class RespostaJson(NamedTuple):
+    etag: str
+    corpo: bytes
+    corpo_gzip: bytes
+
+    @classmethod
+    def de(cls, dados):
+        corpo = json.dumps(dados, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return cls('"' + hashlib.blake2b(corpo, digest_size=12).hexdigest() + '"', corpo, gzip.compress(corpo, 6))
+
+class ServidorSnapshots:
+    """Modo sem interface (--servidor): uma única carga, a mesma dos painéis, e o snapshot de cada painel servido
+    em JSON. Os clientes repetem o ETag em If-None-Match e recebem 304 enquanto nada mudou; /eventos empurra cada
+    snapshot novo (server-sent events). A planilha só é relida quando muda, não importa quantos clientes houver.
+
+    GET /paineis, /snapshot[/n], /eventos[/n] e /metricas (formato texto do Prometheus)."""
+    def __init__(self, fontes, paineis, porta=PORTA_SERVIDOR, host=HOST_SERVIDOR):
+        self.fontes = tuple(fontes); self.paineis = list(paineis); self.porta = porta; self.host = host
+        self.filtros = tuple(dict.fromkeys(painel["filtro"] for painel in self.paineis))
+        self.snapshots = None; self.erro = ""; self.atualizado_em = None
+        self.respostas = [None] * len(self.paineis); self.nova_versao = None
+
+    async def executar(self):
+        self.nova_versao = asyncio.Event()
+        servidor = await asyncio.start_server(self.atender, self.host, self.porta)
+        print(f"Servindo {len(self.paineis)} painel(is) em http://{self.host}:{self.porta}/paineis")
+        async with servidor: await asyncio.gather(servidor.serve_forever(), self.vigiar_planilhas())
+
+    async def vigiar_planilhas(self):
+        while True:
+            inicio = time.perf_counter(); situacao, erro = "sem_mudanca", ""
+            try:
+                snapshots = await asyncio.to_thread(gerar_snapshots, self.fontes, self.filtros)
+                if self.snapshots is None or any(s.alterado for s in snapshots.values()):
+                    self.snapshots = snapshots; self.atualizado_em = datetime.now().isoformat(timespec="seconds"); situacao = "atualizacoes"
+            except Exception as e:
+                erro = str(e) or e.__class__.__name__; situacao = "erros"
+            if situacao != "sem_mudanca" or erro != self.erro:
+                self.erro = erro; self.publicar()
+            METRICAS.fechar_atualizacao(situacao, time.perf_counter() - inicio, erro)
+            await asyncio.sleep(INTERVALO_CHECK_MS / 1000)
+
+    def publicar(self):
+        for i, painel in enumerate(self.paineis):
+            dados = {"titulo": painel["titulo"], "atualizado_em": self.atualizado_em, "erro": self.erro}
+            if self.snapshots is not None: dados.update(snapshot_para_dict(self.snapshots[painel["filtro"]]))
+            self.respostas[i] = RespostaJson.de(dados)
+        # Acorda quem está em /eventos; o próximo aviso usa um evento novo.
+        self.nova_versao.set(); self.nova_versao = asyncio.Event()
+
+    async def atender(self, reader, writer):
+        try:
+            cabecalho = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 10)
+            linhas = cabecalho.decode("latin-1").split("\r\n")
+            metodo, alvo, _ = linhas[0].split(" ", 2)
+            cabecalhos = {nome.strip().lower(): valor.strip() for nome, _, valor in (linha.partition(":") for linha in linhas[1:] if linha)}
+            partes = [parte for parte in urllib.parse.urlsplit(alvo).path.split("/") if parte]
+            rota, indice = (partes[0] if partes else "paineis"), (partes[1] if len(partes) > 1 else "0")
+            if metodo not in ("GET", "HEAD"): await self.responder(writer, 405, b"", extras={"Allow": "GET, HEAD"})
+            elif rota == "paineis" and len(partes) <= 1:
+                paineis = [{"indice": i, "titulo": painel["titulo"], "snapshot": f"/snapshot/{i}", "eventos": f"/eventos/{i}"} for i, painel in enumerate(self.paineis)]
+                await self.responder(writer, 200, json.dumps({"paineis": paineis}, ensure_ascii=False).encode("utf-8"), head=metodo == "HEAD")
+            elif rota == "metricas" and len(partes) == 1:
+                await self.responder(writer, 200, METRICAS.texto_prometheus().encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8", head=metodo == "HEAD")
+            elif rota in ("snapshot", "eventos") and len(partes) <= 2 and indice.isdigit() and int(indice) < len(self.paineis):
+                if rota == "snapshot": await self.responder_snapshot(writer, int(indice), cabecalhos, metodo == "HEAD")
+                else: await self.transmitir_eventos(writer, int(indice), cabecalhos.get("last-event-id"))
+            else: await self.responder(writer, 404, b'{"erro":"rota desconhecida"}')
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ConnectionError, ValueError): pass
+        finally:
+            writer.close()
+            try: await writer.wait_closed()
+            except ConnectionError: pass
+
+    async def responder(self, writer, status, corpo, tipo="application/json; charset=utf-8", extras=None, head=False):
+        cabecalhos = {} if status == 304 else {"Content-Type": tipo, "Content-Length": str(len(corpo))}
+        cabecalhos.update({"Cache-Control": "no-cache", "Access-Control-Allow-Origin": "*", "Connection": "close", **(extras or {})})
+        texto = f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n" + "".join(f"{nome}: {valor}\r\n" for nome, valor in cabecalhos.items()) + "\r\n"
+        writer.write(texto.encode("latin-1") + (b"" if head or status == 304 else corpo)); await writer.drain()
+
+    async def responder_snapshot(self, writer, indice, cabecalhos, head):
+        resposta = self.respostas[indice]
+        if resposta is None:
+            await self.responder(writer, 503, json.dumps({"erro": self.erro or "carregando"}, ensure_ascii=False).encode("utf-8"), extras={"Retry-After": "5"}, head=head); return
+        # Cada codificação tem o seu ETag (o gzip ganha o sufixo "-gz"); os dois valem no If-None-Match.
+        gz = "gzip" in cabecalhos.get("accept-encoding", "")
+        etag = resposta.etag[:-1] + '-gz"' if gz else resposta.etag
+        extras = {"ETag": etag, "Vary": "Accept-Encoding"}
+        if {resposta.etag, resposta.etag[:-1] + '-gz"'} & {valor.strip().removeprefix("W/") for valor in cabecalhos.get("if-none-match", "").split(",")}:
+            await self.responder(writer, 304, b"", extras=extras); return
+        if gz: extras["Content-Encoding"] = "gzip"
+        await self.responder(writer, 200, resposta.corpo_gzip if gz else resposta.corpo, extras=extras, head=head)
+
+    async def transmitir_eventos(self, writer, indice, ultimo_id):
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream; charset=utf-8\r\nCache-Control: no-cache\r\n"
+                     b"Access-Control-Allow-Origin: *\r\nConnection: keep-alive\r\n\r\nretry: 5000\n\n"); await writer.drain()
+        while True:
+            nova_versao = self.nova_versao; resposta = self.respostas[indice]
+            if resposta is not None and resposta.etag.strip('"') != ultimo_id:
+                ultimo_id = resposta.etag.strip('"')
+                writer.write(f"id: {ultimo_id}\nevent: snapshot\ndata: ".encode("utf-8") + resposta.corpo + b"\n\n"); await writer.drain()
+            try: await asyncio.wait_for(nova_versao.wait(), 15)
+            except asyncio.TimeoutError:
+                # Comentário SSE: mantém a conexão viva em proxies e detecta cliente que caiu.
+                writer.write(b": ping\n\n"); await writer.drain()
+
 if __name__ == '__main__':
-    app = QApplication(sys.argv)
     try: locale.setlocale(locale.LC_ALL, 'pt_BR.UTF-8')
     except locale.Error: print("Aviso: Local 'pt_BR.UTF-8' não pôde ser definido.")
-    window = PainelMtec()
-    window.showFullScreen()
+    fontes, config_paineis = carregar_configuracao()
+    if "--servidor" in sys.argv:
+        argumentos = sys.argv[sys.argv.index("--servidor") + 1:]
+        porta = int(argumentos[0]) if argumentos and argumentos[0].isdigit() else PORTA_SERVIDOR
+        HISTORICO = HistoricoPedidos(caminho_servidor(CAMINHO_HISTORICO))
+        METRICAS.configurar(caminho_servidor(CAMINHO_LOG_METRICAS), caminho_servidor(CAMINHO_METRICAS_PROM))
+        try: asyncio.run(ServidorSnapshots(fontes, config_paineis, porta).executar())
+        except KeyboardInterrupt: pass
+        sys.exit(0)
+    METRICAS.configurar()
+    app = QApplication(sys.argv)
+    ultimos, gravado_em = carregar_ultimo_snapshot()
+    telas = app.screens(); janelas = []
+    for config in config_paineis:
+        window = PainelMtec(config["titulo"], config["filtro"])
+        tela = telas[config["tela"]] if 0 <= config["tela"] < len(telas) else app.primaryScreen()
+        window.setGeometry(tela.geometry()); window.showFullScreen(); janelas.append(window)
+        if chave_filtro(config["filtro"]) in ultimos: window.aplicar_snapshot(ultimos[chave_filtro(config["filtro"])], gravado_em)
+    # Pinta o primeiro quadro antes de a primeira carga (e o import do pandas) começar.
+    app.processEvents()
+    METRICAS.registrar_primeiro_quadro(time.perf_counter() - INICIO_PROCESSO, bool(ultimos))
+    if "--medir-inicio" in sys.argv:
+        print(f"primeiro quadro em {METRICAS.primeiro_quadro * 1000:.0f} ms ({'com' if ultimos else 'sem'} snapshot salvo; pandas importado: {'pandas' in sys.modules})")
+        sys.exit(0)
+    coordenador = CoordenadorPaineis(fontes, janelas)
+    app.aboutToQuit.connect(coordenador.encerrar)
     sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,143 @@
+"""Testes do pipeline de dados do painel. Rodar na pasta PainelEXE: python -m pytest -q (ou python -m unittest)."""
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import prioridades as p
+
+AGORA = datetime(2025, 7, 22, 15, 0)
+
+def planilha(linhas):
+    """DataFrame como o carregar_dados entrega, a partir de (pedido, pv, status, data_status, qtd)."""
+    df = pd.DataFrame(linhas, columns=[p.COLUNA_PEDIDO_ID, p.COLUNA_PV, p.COLUNA_STATUS, p.COLUNA_DATA_STATUS, p.COLUNA_QTD])
+    df[p.COLUNA_DATA_STATUS] = pd.to_datetime(df[p.COLUNA_DATA_STATUS])
+    return p.preparar_dados(df, p.FontePlanilha("teste.xlsx"))
+
+def planilha_base():
+    hoje, ontem, mes_passado = AGORA - timedelta(hours=2), AGORA - timedelta(days=1), AGORA - timedelta(days=30)
+    return [("CV-001", "TERAVIX", p.STATUS_CONCLUIDO, hoje, 3), ("CV-002", "121564", p.STATUS_CONCLUIDO, hoje, 1),
+            ("CV-003", "TERAVIX", p.STATUS_CANCELADO, hoje, 2), ("CV-004", "120000", p.STATUS_CONCLUIDO, ontem, 5),
+            ("CV-005", "TERAVIX", p.STATUS_CONCLUIDO, mes_passado, 4), ("CV-006", "TERAVIX", p.STATUS_PENDENTE, None, 1),
+            ("CV-007", "121000", p.STATUS_AGUARDANDO, hoje, 2)]
+
+class TesteHistorico(unittest.TestCase):
+    def setUp(self):
+        self.pasta = tempfile.mkdtemp(); self.historico_original = p.HISTORICO
+        p.HISTORICO = p.HistoricoPedidos(os.path.join(self.pasta, "historico.sqlite3"))
+
+    def tearDown(self):
+        if p.HISTORICO.conexao is not None: p.HISTORICO.conexao.close()
+        p.HISTORICO = self.historico_original; shutil.rmtree(self.pasta, ignore_errors=True)
+
+    def assertHistoricoIgualPlanilha(self, linhas):
+        df = planilha(linhas); p.HISTORICO.registrar(df)
+        for filtro in (p.SEM_FILTRO, p.FiltroPainel(pv=("TERAVIX",)), p.FiltroPainel(pv=("PV",))):
+            com_historico = p.dados_do_painel(df, filtro, AGORA)[-1]; sem_historico = p.dados_do_painel(df, filtro, AGORA, usar_historico=False)[-1]
+            self.assertEqual(com_historico, sem_historico, filtro)
+        return df
+
+    def test_edicoes_exclusoes_e_renomeacoes(self):
+        linhas = planilha_base(); self.assertHistoricoIgualPlanilha(linhas)
+        linhas[1] = linhas[1][:4] + (7,); linhas[3] = linhas[3][:2] + (p.STATUS_CANCELADO,) + linhas[3][3:]
+        self.assertHistoricoIgualPlanilha(linhas)
+        del linhas[0]
+        self.assertHistoricoIgualPlanilha(linhas)
+        linhas[0] = ("CV-902",) + linhas[0][1:]
+        df = self.assertHistoricoIgualPlanilha(linhas)
+        concluidos_hoje = p.dados_do_painel(df, agora=AGORA)[1]
+        self.assertEqual(p.dados_do_painel(df, agora=AGORA)[-1].totais_concluidos_hoje[2], len(concluidos_hoje))
+
+    def test_pedidos_repetidos(self):
+        linhas = planilha_base(); linhas.append(linhas[0])
+        self.assertHistoricoIgualPlanilha(linhas)
+        self.assertHistoricoIgualPlanilha(linhas[:-1])
+
+    def test_dois_processos_no_mesmo_arquivo(self):
+        # Dois processos de painel na mesma pasta lendo a mesma planilha e gravando no mesmo histórico.
+        outro = p.HistoricoPedidos(p.HISTORICO.caminho)
+        linhas = planilha_base(); outro.registrar(planilha(linhas)); self.assertHistoricoIgualPlanilha(linhas)
+        linhas = [(pedido, pv, p.STATUS_CONCLUIDO, AGORA - timedelta(hours=1), qtd) for pedido, pv, _, _, qtd in linhas]
+        outro.registrar(planilha(linhas)); self.assertHistoricoIgualPlanilha(linhas)
+        outro.registrar(planilha(linhas[2:])); self.assertHistoricoIgualPlanilha(linhas[2:])
+        outro.conexao.close()
+
+class TesteResumo(unittest.TestCase):
+    def test_grafico_semanal_sem_concluidos(self):
+        semanas = p.janela_indicadores(AGORA)[-1]
+        for linhas in ([], [linha for linha in planilha_base() if linha[2] != p.STATUS_CONCLUIDO]):
+            resumo = p.dados_do_painel(planilha(linhas), agora=AGORA, usar_historico=False)[-1]
+            self.assertEqual(resumo.semanal, tuple((semana, 0) for semana in semanas))
+
+class TesteLeitura(unittest.TestCase):
+    def test_linhas_vazias_no_meio_da_planilha(self):
+        import openpyxl
+        pasta = tempfile.mkdtemp(); self.addCleanup(shutil.rmtree, pasta, True)
+        caminho = os.path.join(pasta, "planilha.xlsx"); wb = openpyxl.Workbook(); aba = wb.active
+        aba.append([p.COLUNA_PEDIDO_ID, p.COLUNA_PV, p.COLUNA_STATUS, p.COLUNA_QTD])
+        aba.append(["CV-001", "TERAVIX", p.STATUS_CONCLUIDO, 1])
+        for _ in range(60): aba.append([])
+        aba.append(["CV-062", "121564", p.STATUS_PENDENTE, 2])
+        wb.save(caminho)
+        lido = p.normalizar_leitura(p.ler_planilha_openpyxl(caminho))
+        self.assertEqual(lido[p.COLUNA_PEDIDO_ID].dropna().tolist(), ["CV-001", "CV-062"])
+        pd.testing.assert_frame_equal(lido, p.normalizar_leitura(p.ler_planilha_pandas(caminho)))
+
+class TesteCache(unittest.TestCase):
+    def setUp(self):
+        import openpyxl
+        self.pasta = tempfile.mkdtemp(); self.addCleanup(shutil.rmtree, self.pasta, True)
+        originais = (p.HISTORICO, p.PASTA_CACHE_LEITURA, dict(p._CACHE_PLANILHA))
+        def restaurar():
+            if p.HISTORICO.conexao is not None: p.HISTORICO.conexao.close()
+            p.HISTORICO, p.PASTA_CACHE_LEITURA = originais[:2]; p._CACHE_PLANILHA.clear(); p._CACHE_PLANILHA.update(originais[2])
+        self.addCleanup(restaurar)
+        p.HISTORICO = p.HistoricoPedidos(os.path.join(self.pasta, "historico.sqlite3")); p.PASTA_CACHE_LEITURA = os.path.join(self.pasta, "cache")
+        p._CACHE_PLANILHA.update(resultado=None, entregue=False)
+        self.fonte = p.FontePlanilha(os.path.join(self.pasta, "planilha.xlsx")); wb = openpyxl.Workbook()
+        wb.active.append([p.COLUNA_PEDIDO_ID, p.COLUNA_PV, p.COLUNA_STATUS, p.COLUNA_DATA_STATUS, p.COLUNA_QTD])
+        for linha in planilha_base(): wb.active.append(list(linha))
+        wb.save(self.fonte.caminho)
+
+    def test_carga_cancelada_nao_conta_como_entregue(self):
+        filtros = (p.SEM_FILTRO, p.FiltroPainel(pv=("TERAVIX",)))
+        consultas = iter((False, False, True))  # cancela no meio da montagem dos snapshots
+        with self.assertRaises(p.CargaCancelada): p.gerar_snapshots((self.fonte,), filtros, lambda: next(consultas))
+        os.utime(self.fonte.caminho)  # salvou de novo sem mudar o conteúdo
+        self.assertTrue(all(s.alterado for s in p.gerar_snapshots((self.fonte,), filtros).values()))
+        self.assertFalse(any(s.alterado for s in p.gerar_snapshots((self.fonte,), filtros).values()))
+
+class TestePainel(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        from PySide6.QtWidgets import QApplication
+        cls.app = QApplication.instance() or QApplication([])
+
+    def pedidos_na_tela(self, snapshot):
+        janela = p.PainelMtec(); self.addCleanup(janela.deleteLater); janela.aplicar_snapshot(snapshot)
+        na_tela = [card.titulo.text().split(": ", 1)[1].split("<")[0] for card in janela.cards_prioridade if not card.isHidden()]
+        for lista in (janela.lista_pendentes, janela.lista_aguardando_montagem, janela.lista_aguardando_chegada):
+            na_tela += [linha.pedido for linha in lista["modelo"].linhas]
+        return na_tela
+
+    def snapshot(self, principal):
+        return p.SnapshotPainel(tuple(principal), (), (), (0,) * 6, (0,) * 6, p.MappingProxyType(p.calcular_metricas_dashboard(
+            p.dados_do_painel(planilha([]), agora=AGORA, usar_historico=False)[-1])), (), True)
+
+    def test_todo_pedido_em_aberto_aparece_uma_vez(self):
+        status = [p.STATUS_EM_MONTAGEM] * 7 + [p.STATUS_AGUARDANDO] * 3 + [p.STATUS_PENDENTE, p.STATUS_AGUARDANDO_CHEGADA]
+        principal = [p.LinhaPedido(f"CV-{i:03d}", "TERAVIX", "", s, None, 1, i) for i, s in enumerate(status)]
+        self.assertEqual(sorted(self.pedidos_na_tela(self.snapshot(principal))), sorted(l.pedido for l in principal))
+
+    def test_planilha_de_exemplo(self):
+        # dados/Status_dos_pedidos.xlsm tem mais pedidos "Aguardando Montagem"/"Em Montagem" do que cards.
+        principal = p.linhas_do_dataframe(p.dados_do_painel(p.carregar_dados(p.FONTES_PADRAO), agora=AGORA, usar_historico=False)[0])
+        self.assertEqual(sorted(self.pedidos_na_tela(self.snapshot(principal))), sorted(l.pedido for l in principal))
+
+if __name__ == "__main__":
+    unittest.main()